@@ -3,8 +3,103 @@
 This provides a small wrapper to expose the `db` instance on the FastAPI
 app.state so routers can access it easily.
 """
+import os
+from typing import Dict
+
 from fastapi import Request
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+
+# Connection pool defaults, overridable through the environment
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "200"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Wire compression, in order of preference; PyMongo skips (with a warning)
+# any compressor whose library is not installed
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters, reported by the health endpoint.
+
+    Updated from PyMongo's threads without locking, so values are approximate.
+    """
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.check_out_failures = 0
+        self.pool_clears = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "check_out_failures": self.check_out_failures,
+            "pool_clears": self.pool_clears,
+        }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.check_out_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+
+pool_stats = PoolStats()
+
+
+def make_motor_client(
+    uri: str,
+    *,
+    max_pool: int = MONGO_MAX_POOL_SIZE,
+    min_pool: int = MONGO_MIN_POOL_SIZE,
+) -> AsyncIOMotorClient:
+    """Create a Motor client with an explicitly sized connection pool.
+
+    A warm minimum pool avoids connection setup on the first requests, and the
+    larger maximum keeps startup seeding from starving concurrent traffic.
+    Wire compression shrinks the large product documents on the network, and
+    pool activity is tracked in `pool_stats`.
+    """
+    return AsyncIOMotorClient(
+        uri,
+        maxPoolSize=max_pool,
+        minPoolSize=min_pool,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        compressors=MONGO_COMPRESSORS,
+        retryWrites=True,
+        event_listeners=[pool_stats],
+    )
 
 
 def get_db_from_app(app) -> AsyncIOMotorDatabase:
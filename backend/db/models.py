@@ -4,16 +4,20 @@ These models are used for request/response validation for the products API.
 """
 from __future__ import annotations
 
-from typing import List, Optional, Any
-from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing_extensions import TypedDict
 from bson import ObjectId
 
-class SellerBusinessInfo(BaseModel):
+
+# Nested product sections are TypedDicts so validating a Product does not
+# build a BaseModel instance for every sub-object.
+class SellerBusinessInfo(TypedDict, total=False):
     business_name: Optional[str]
     registration_number: Optional[str]
 
 
-class Seller(BaseModel):
+class Seller(TypedDict, total=False):
     seller_id: Optional[str]
     name: Optional[str]
     rating: Optional[float]
@@ -25,18 +29,23 @@ class Seller(BaseModel):
     business_info: Optional[SellerBusinessInfo]
 
 
-class Shipping(BaseModel):
+class RemoteAreaFee(TypedDict, total=False):
+    jeju: Optional[int]
+    island: Optional[int]
+
+
+class Shipping(TypedDict, total=False):
     method: Optional[str]
     courier: Optional[str]
     delivery_time_days: Optional[int]
     shipping_fee: Optional[int]
-    remote_area_fee: Optional[dict]
+    remote_area_fee: Optional[RemoteAreaFee]
     bundle_shipping: Optional[bool]
     rocket_delivery: Optional[bool]
     additional_info: Optional[str]
 
 
-class ReturnPolicy(BaseModel):
+class ReturnPolicy(TypedDict, total=False):
     return_available: Optional[bool]
     return_period_days: Optional[int]
     return_fee: Optional[int]
@@ -47,30 +56,47 @@ class ReturnPolicy(BaseModel):
     restrictions: Optional[List[str]]
 
 
-class Ratings(BaseModel):
+# Star rating ("1".."5") -> number of ratings
+RatingDistribution = TypedDict(
+    "RatingDistribution",
+    {"1": int, "2": int, "3": int, "4": int, "5": int},
+    total=False,
+)
+
+
+class Ratings(TypedDict, total=False):
     average: Optional[float]
     count: Optional[int]
-    distribution: Optional[dict]
+    distribution: Optional[RatingDistribution]
 
 
-class Reviews(BaseModel):
+class Reviews(TypedDict, total=False):
     photo_review_count: Optional[int]
     with_text_count: Optional[int]
 
 
-class ProductOption(BaseModel):
+class ProductOption(TypedDict, total=False):
     color: Optional[str]
     size: Optional[str]
     stock: Optional[int]
     additional_price: Optional[int]
 
 
+class ProductAttributes(TypedDict, total=False):
+    color: Optional[str]
+    size: Optional[str]
+    material: Optional[str]
+    season: Optional[str]
+    gender: Optional[str]
+    made_in: Optional[str]
+
+
 class Product(BaseModel):
     id: Optional[str] = Field(alias="_id")
     product_id: Optional[str]
     title: Optional[str]
     brand: Optional[str]
-    category: Optional[List[str]]
+    category: Optional[tuple[str, ...]]
     price: Optional[int]
     original_price: Optional[int]
     discount_rate: Optional[int]
@@ -79,13 +105,13 @@ class Product(BaseModel):
     seller: Optional[Seller]
     description: Optional[str]
     images: Optional[List[str]]
-    attributes: Optional[dict]
+    attributes: Optional[ProductAttributes]
     options: Optional[List[ProductOption]]
     shipping: Optional[Shipping]
     return_policy: Optional[ReturnPolicy]
     ratings: Optional[Ratings]
     reviews: Optional[Reviews]
-    tags: Optional[List[str]]
+    tags: Optional[tuple[str, ...]]
     coupons_available: Optional[bool]
     wow_member_discount: Optional[int]
     question_count: Optional[int]
@@ -104,6 +130,20 @@ class Product(BaseModel):
 def get_products_collection(db) -> Any:
     return db.get_collection("products")
 
+
+def add_product_search_fields(doc: dict) -> dict:
+    """Populate the lowercased `brand_lc` / `category_lc` lookup fields.
+
+    These let product search use equality / `$in` index bounds instead of
+    case-insensitive regexes. Call on every product write.
+    """
+    brand = doc.get("brand")
+    doc["brand_lc"] = brand.lower() if isinstance(brand, str) else None
+    categories = doc.get("category") or []
+    doc["category_lc"] = [c.lower() for c in categories if isinstance(c, str)]
+    return doc
+
+
 def get_users_collection(db) -> Any:
     return db.get_collection("users")
 
@@ -118,6 +158,10 @@ class User(BaseModel):
     }
 
 
+# Built once so validators are reused across list requests
+USER_LIST_ADAPTER: TypeAdapter[list[User]] = TypeAdapter(list[User])
+
+
 # ---------------------------------------------------------------------------
 # Shared API models (moved from backend/models.py)
 # ---------------------------------------------------------------------------
@@ -126,6 +170,8 @@ class User(BaseModel):
 class HealthResponse(BaseModel):
     status: str
     mongodb: str
+    mongodb_pool: Optional[Dict[str, int]] = None
+    embedding_cache: Optional[Dict[str, int]] = None
 
 
 class MessageRequest(BaseModel):
@@ -8,68 +8,176 @@ startup. Runs only when not in production unless forced.
 
 from __future__ import annotations
 
-import json
+import asyncio
 import os
-from typing import Any
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable
 
+import ijson
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from pymongo.write_concern import WriteConcern
 
+from db.models import add_product_search_fields
 
-async def seed_products_if_empty(db: AsyncIOMotorDatabase, *, force: bool = False) -> dict[str, Any]:
-    """Seed the `products` collection from utils/db_seed.json if it's empty.
+
+_SEED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils"))
+
+# Keep each insert command well under MongoDB's 16 MB limit
+_INSERT_BATCH_SIZE = 1000
+_INSERT_CONCURRENCY = 4
+
+# Seed data is trusted and targets empty collections, so skip majority acks
+# and server-side schema validation on insert
+_SEED_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Resolved once at import; the first non-empty variable wins
+_ENV_VARS = ("NODE_ENV", "ENV", "PY_ENV", "PYTHON_ENV", "FASTAPI_ENV", "ENVIRONMENT")
+_ENV = next((os.environ[k] for k in _ENV_VARS if os.environ.get(k)), "development")
+
+# One document per one-time startup task, claimed by the first worker
+_STARTUP_LOCKS_COLLECTION = "startup_locks"
+# Long enough to cover the workers of one deploy starting up, short enough
+# that the next deploy (or a restart) runs the tasks again
+_STARTUP_LOCK_TTL_SECONDS = 60
+
+
+async def _insert_in_batches(coll: Any, docs: Iterable[dict[str, Any]]) -> int:
+    """Insert `docs` as unordered batches with bounded concurrency.
+
+    `docs` is consumed lazily, so at most `_INSERT_CONCURRENCY` batches are
+    held in memory at any time.
+
+    Returns:
+        The total number of inserted documents.
+    """
+    inserted_count = 0
+    pending: set[asyncio.Task[int]] = set()
+
+    async def insert_batch(batch: list[dict[str, Any]]) -> int:
+        result = await coll.insert_many(batch, ordered=False, bypass_document_validation=True)
+        return len(result.inserted_ids)
+
+    async def wait_for_slots(max_pending: int) -> None:
+        nonlocal inserted_count
+        while len(pending) > max_pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                inserted_count += task.result()
+
+    try:
+        batch: list[dict[str, Any]] = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= _INSERT_BATCH_SIZE:
+                await wait_for_slots(_INSERT_CONCURRENCY - 1)
+                pending.add(asyncio.create_task(insert_batch(batch)))
+                batch = []
+        if batch:
+            await wait_for_slots(_INSERT_CONCURRENCY - 1)
+            pending.add(asyncio.create_task(insert_batch(batch)))
+        await wait_for_slots(0)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return inserted_count
+
+
+async def _seed_collection_from_json(
+    db: AsyncIOMotorDatabase,
+    coll_name: str,
+    seed_filename: str,
+    *,
+    label: str,
+    force: bool = False,
+    validate: Callable[[Any], bool] = lambda d: type(d) is dict,
+    prepare: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    extra: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Seed `coll_name` from a JSON array in utils/`seed_filename` if it's empty.
 
     Args:
         db: motor database instance
+        coll_name: target collection name
+        seed_filename: file name of the seed JSON array inside utils/
+        label: human readable document kind used in status messages
         force: when True, will seed regardless of environment and even if some
             documents exist (but will not delete existing documents).
+        validate: predicate selecting which array items are inserted
+        prepare: optional hook applied to each valid item before insert
+        extra: additional keys merged into the summary on successful insert
 
     Returns:
         A summary dict with inserted count and status.
     """
-    env = os.getenv("NODE_ENV") or os.getenv("ENV") or os.getenv("PY_ENV") or os.getenv("PYTHON_ENV") or os.getenv("FASTAPI_ENV") or os.getenv("ENVIRONMENT")
-    # Default to development if not set
-    env = env or os.getenv("ENVIRONMENT", "development")
-
-    if env == "production" and not force:
+    if _ENV == "production" and not force:
         return {"status": "skipped", "reason": "production environment"}
 
-    products_coll = db.get_collection("products")
+    coll = db.get_collection(coll_name)
 
-    existing_count = await products_coll.count_documents({})
-    if existing_count > 0 and not force:
-        return {"status": "skipped", "reason": "products collection not empty", "existing": existing_count}
+    # Only emptiness matters here; avoid an exact O(N) count
+    existing = await coll.find_one({}, projection={"_id": 1})
+    if existing is not None and not force:
+        return {
+            "status": "skipped",
+            "reason": f"{coll_name} collection not empty",
+            "existing": await coll.estimated_document_count(),
+        }
 
-    # Load seed file relative to this module: ../../backend/utils/db_seed.json
-    seed_path = os.path.join(os.path.dirname(__file__), "..", "utils", "db_seed.json")
-    seed_path = os.path.abspath(seed_path)
+    seed_coll = coll.with_options(write_concern=_SEED_WRITE_CONCERN)
+    seed_path = os.path.join(_SEED_DIR, seed_filename)
 
     try:
-        with open(seed_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(seed_path, "rb") as f:
+            if not f.read(64).lstrip().startswith(b"["):
+                return {
+                    "status": "error",
+                    "reason": f"seed file must contain a top-level JSON array of {label}s",
+                }
+            f.seek(0)
+            # Stream array items so memory is bounded by the insert batches
+            items = ijson.items(f, "item", use_float=True)
+            docs = (item for item in items if validate(item))
+            if prepare is not None:
+                docs = map(prepare, docs)
+            inserted_count = await _insert_in_batches(seed_coll, docs)
     except FileNotFoundError:
         return {"status": "error", "reason": f"seed file not found at {seed_path}"}
-    except json.JSONDecodeError as e:
+    except ijson.JSONError as e:
         return {"status": "error", "reason": f"invalid json: {e}"}
+    except Exception as e:
+        return {"status": "error", "reason": str(e)}
 
-    if not isinstance(data, list):
-        return {"status": "error", "reason": "seed file must contain a top-level JSON array of products"}
+    if not inserted_count:
+        return {"status": "skipped", "reason": f"no valid {label} documents in seed file"}
 
-    # Prepare documents: ensure _id not set and product_id exists
-    to_insert = []
-    for item in data:
-        if not isinstance(item, dict):
-            continue
-        # map product_id to a unique field, but don't set _id to avoid collisions
-        to_insert.append(item)
+    return {"status": "inserted", "inserted_count": inserted_count, **(extra or {})}
 
-    if not to_insert:
-        return {"status": "skipped", "reason": "no valid product documents in seed file"}
 
-    try:
-        result = await products_coll.insert_many(to_insert)
-        return {"status": "inserted", "inserted_count": len(result.inserted_ids)}
-    except Exception as e:
-        return {"status": "error", "reason": str(e)}
+async def seed_products_if_empty(db: AsyncIOMotorDatabase, *, force: bool = False) -> dict[str, Any]:
+    """Seed the `products` collection from utils/db_seed.json if it's empty.
+
+    Args:
+        db: motor database instance
+        force: when True, will seed regardless of environment and even if some
+            documents exist (but will not delete existing documents).
+
+    Returns:
+        A summary dict with inserted count and status.
+    """
+    # Documents are inserted as-is; _id is left unset to avoid collisions
+    return await _seed_collection_from_json(
+        db,
+        "products",
+        "db_seed.json",
+        label="product",
+        force=force,
+        prepare=add_product_search_fields,
+    )
+
 
 async def seed_users_if_empty(db: AsyncIOMotorDatabase, *, force: bool = False) -> dict[str, Any]:
     """Seed the `users` collection with default users if it's empty.
@@ -82,24 +190,25 @@ async def seed_users_if_empty(db: AsyncIOMotorDatabase, *, force: bool = False)
     Returns:
         A summary dict with inserted count and status.
     """
-    env = os.getenv("NODE_ENV") or os.getenv("ENV") or os.getenv("PY_ENV") or os.getenv("PYTHON_ENV") or os.getenv("FASTAPI_ENV") or os.getenv("ENVIRONMENT")
-    # Default to development if not set
-    env = env or os.getenv("ENVIRONMENT", "development")
-
-    if env == "production" and not force:
+    if _ENV == "production" and not force:
         return {"status": "skipped", "reason": "production environment"}
 
     users_coll = db.get_collection("users")
 
-    existing_count = await users_coll.count_documents({})
-    if existing_count > 0 and not force:
-        return {"status": "skipped", "reason": "users collection not empty", "existing": existing_count}
+    existing = await users_coll.find_one({}, projection={"_id": 1})
+    if existing is not None and not force:
+        return {
+            "status": "skipped",
+            "reason": "users collection not empty",
+            "existing": await users_coll.estimated_document_count(),
+        }
 
     base_usernames = [
         "Customer"
     ]
 
-    # Determine starting user_id (continue after max existing user_id if any)
+    # Determine starting user_id (continue after max existing user_id if any);
+    # the user_id index (see ensure_user_indexes) makes this a single btree seek
     max_doc = await users_coll.find_one(sort=[("user_id", -1)], projection={"user_id": 1})
     start_id = 1
     if max_doc and isinstance(max_doc.get("user_id"), int):
@@ -109,7 +218,9 @@ async def seed_users_if_empty(db: AsyncIOMotorDatabase, *, force: bool = False)
     default_users = [{"username": name, "user_id": start_id + idx} for idx, name in enumerate(base_usernames)]
 
     try:
-        result = await users_coll.insert_many(default_users)
+        result = await users_coll.with_options(write_concern=_SEED_WRITE_CONCERN).insert_many(
+            default_users, bypass_document_validation=True
+        )
         return {"status": "inserted", "inserted_count": len(result.inserted_ids), "inserted_ids": [str(_id) for _id in result.inserted_ids]}
     except Exception as e:
         return {"status": "error", "reason": str(e)}
@@ -130,72 +241,153 @@ async def seed_user_profiles_if_empty(
     Returns:
         A summary dict with inserted count and status.
     """
-    env = (
-        os.getenv("NODE_ENV")
-        or os.getenv("ENV")
-        or os.getenv("PY_ENV")
-        or os.getenv("PYTHON_ENV")
-        or os.getenv("FASTAPI_ENV")
-        or os.getenv("ENVIRONMENT")
+    return await _seed_collection_from_json(
+        db,
+        "user_profiles",
+        "user_profile_seed.json",
+        label="user profile",
+        force=force,
+        validate=lambda d: type(d) is dict and "user_id" in d,
+        extra={"note": "Profiles stored in MongoDB. Sync to Qdrant on first API call."},
     )
-    # Default to development if not set
-    env = env or os.getenv("ENVIRONMENT", "development")
 
-    if env == "production" and not force:
-        return {"status": "skipped", "reason": "production environment"}
 
-    profiles_coll = db.get_collection("user_profiles")
+async def ensure_product_indexes(db: AsyncIOMotorDatabase) -> list[str]:
+    """Create the products search indexes if missing (idempotent).
 
-    existing_count = await profiles_coll.count_documents({})
-    if existing_count > 0 and not force:
-        return {
-            "status": "skipped",
-            "reason": "user_profiles collection not empty",
-            "existing": existing_count,
-        }
+    The product_id index is built separately by `ensure_product_id_index`,
+    so bad product data can't block the text index.
+    """
+    return await db.get_collection("products").create_indexes([
+        IndexModel([("category_lc", ASCENDING)]),
+        # Filter + sort of search_products_by_query, so results come back in
+        # index order without an in-memory SORT stage (also serves brand_lc)
+        IndexModel([
+            ("brand_lc", ASCENDING),
+            ("category_lc", ASCENDING),
+            ("ratings.average", DESCENDING),
+            ("discount_rate", DESCENDING),
+        ]),
+        # Backs the $text search in llm_api.product_context
+        IndexModel(
+            [("title", TEXT), ("description", TEXT), ("category", TEXT), ("tags", TEXT)],
+            name="products_text",
+        ),
+    ])
+
+
+async def ensure_product_id_index(db: AsyncIOMotorDatabase) -> list[str]:
+    """Create the product_id lookup index, unique when the data allows it.
+
+    Raises:
+        OperationFailure: If the unique index could not be built (e.g.
+            duplicate product_ids); a plain lookup index is created instead.
+    """
+    products = db.get_collection("products")
+    try:
+        # One document per product_id (GET /api/products/{id} lookups);
+        # partial, so documents without a product_id don't collide
+        return await products.create_indexes([
+            IndexModel(
+                [("product_id", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"product_id": {"$exists": True}},
+            ),
+        ])
+    except OperationFailure:
+        await products.create_indexes([IndexModel([("product_id", ASCENDING)])])
+        raise
+
+
+async def ensure_message_indexes(db: AsyncIOMotorDatabase) -> list[str]:
+    """Create the chat messages indexes if missing (idempotent)."""
+    return await db.get_collection("messages").create_indexes([
+        # Per-user history, newest first (GET /api/messages)
+        IndexModel([("user_id", ASCENDING), ("_id", DESCENDING)]),
+    ])
+
+
+async def ensure_user_profile_indexes(db: AsyncIOMotorDatabase) -> list[str]:
+    """Create the user profiles index if missing (idempotent)."""
+    return await db.get_collection("user_profiles").create_indexes([
+        # Profiles are read and upserted by user_id, one document per user
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ])
+
+
+async def ensure_user_indexes(db: AsyncIOMotorDatabase) -> list[str]:
+    """Create the users index if missing (idempotent)."""
+    return await db.get_collection("users").create_indexes([
+        # Max user_id lookup of seed_users_if_empty; not unique, since
+        # existing user documents may lack the field
+        IndexModel([("user_id", DESCENDING)]),
+    ])
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> dict[str, Any]:
+    """Create the indexes behind the hot query paths, one collection at a time
+    in parallel.
+
+    A failure on one collection (e.g. duplicate user_ids blocking the unique
+    profile index) doesn't prevent the others; neither do duplicate
+    product_ids, which only cost the product_id uniqueness.
 
-    # Load seed file relative to this module: ../../backend/utils/user_profile_seed.json
-    seed_path = os.path.join(
-        os.path.dirname(__file__), "..", "utils", "user_profile_seed.json"
+    Returns:
+        Collection name -> created index names, or the exception raised.
+    """
+    collections = ("products", "products.product_id", "messages", "user_profiles", "users")
+    results = await asyncio.gather(
+        ensure_product_indexes(db),
+        ensure_product_id_index(db),
+        ensure_message_indexes(db),
+        ensure_user_profile_indexes(db),
+        ensure_user_indexes(db),
+        return_exceptions=True,
     )
-    seed_path = os.path.abspath(seed_path)
+    return dict(zip(collections, results))
 
-    try:
-        with open(seed_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        return {"status": "error", "reason": f"seed file not found at {seed_path}"}
-    except json.JSONDecodeError as e:
-        return {"status": "error", "reason": f"invalid json: {e}"}
 
-    if not isinstance(data, list):
-        return {
-            "status": "error",
-            "reason": "seed file must contain a top-level JSON array of user profiles",
-        }
+async def backfill_product_search_fields(db: AsyncIOMotorDatabase) -> int:
+    """Populate `brand_lc` / `category_lc` on products written before they existed.
 
-    # Prepare documents
-    to_insert = []
-    for item in data:
-        if not isinstance(item, dict) or "user_id" not in item:
-            continue
-        to_insert.append(item)
+    Returns:
+        The number of updated documents.
+    """
+    result = await db.get_collection("products").update_many(
+        {"brand_lc": {"$exists": False}},
+        [{
+            "$set": {
+                "brand_lc": {"$toLower": "$brand"},
+                "category_lc": {
+                    "$map": {"input": {"$ifNull": ["$category", []]}, "in": {"$toLower": "$$this"}}
+                },
+            }
+        }],
+    )
+    return result.modified_count
 
-    if not to_insert:
-        return {
-            "status": "skipped",
-            "reason": "no valid user profile documents in seed file",
-        }
 
+async def claim_startup_task(db: AsyncIOMotorDatabase, name: str) -> bool:
+    """Claim a one-time startup task (seeding, index builds, ...) for this process.
+
+    Every uvicorn worker runs the app lifespan; only the first to claim `name`
+    within `_STARTUP_LOCK_TTL_SECONDS` gets True, so the task runs once per
+    deploy instead of once per worker.
+    """
+    now = datetime.now(timezone.utc)
     try:
-        result = await profiles_coll.insert_many(to_insert)
-        return {
-            "status": "inserted",
-            "inserted_count": len(result.inserted_ids),
-            "note": "Profiles stored in MongoDB. Sync to Qdrant on first API call.",
-        }
-    except Exception as e:
-        return {"status": "error", "reason": str(e)}
+        # Matches only an expired claim; otherwise the upsert collides on _id
+        await db.get_collection(_STARTUP_LOCKS_COLLECTION).update_one(
+            {"_id": name, "expires_at": {"$lte": now}},
+            {"$set": {
+                "expires_at": now + timedelta(seconds=_STARTUP_LOCK_TTL_SECONDS),
+                "pid": os.getpid(),
+            }},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
 
 
 async def seed_if_empty(db: AsyncIOMotorDatabase, *, force: bool = False) -> dict[str, Any]:
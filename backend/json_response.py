@@ -0,0 +1,16 @@
+"""orjson-backed JSON response used as the app's default response class."""
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """`fastapi.responses.ORJSONResponse` that also serializes Mongo values.
+
+    Anything orjson doesn't know natively (ObjectId, Decimal128, ...) is
+    rendered with `str()`; datetimes and dataclasses stay native.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
@@ -2,11 +2,69 @@
 
 import os
 import asyncio
-from typing import Optional
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import SystemMessage, HumanMessage
+import logging
+import random
+import re
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 
-from .prompts import SHOPPING_ASSISTANT_SYSTEM_PROMPT, create_user_message_with_context
+from .prompts import (
+    SHOPPING_ASSISTANT_SYSTEM_PROMPT,
+    SHOPPING_ASSISTANT_WITH_SENTIMENT_PROMPT,
+    create_user_message_with_context,
+)
+
+# LangChain / Google client libraries are imported lazily: they pull in grpc
+# and protobuf schemas, which would otherwise slow down app startup.
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a single retry sleep, in seconds
+MAX_BACKOFF_SECONDS = 8
+
+
+@lru_cache(maxsize=None)
+def _retryable_errors() -> tuple[type[BaseException], ...]:
+    """Transient failures worth retrying.
+
+    Anything else (bad API key, permission denied, invalid prompt) goes
+    straight to the fallback response.
+    """
+    from google.api_core import exceptions as google_exceptions
+
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        ConnectionError,
+        asyncio.TimeoutError,
+    )
+
+
+# Keys every sentiment feature returned by the combined prompt must carry
+_SENTIMENT_FEATURE_KEYS = frozenset({"feature", "sentence", "sentiment", "score"})
+
+# Queries about product availability or stock ("in stock" is covered by "stock")
+_STOCK_RE = re.compile(r"\b(?:stock|available|buy|purchase|get)\b", re.IGNORECASE)
+
+# Start of a (possibly fenced) JSON answer, or a bare "reply" key
+_JSON_LIKE_RE = re.compile(r'^\s*(?:```|[{\[])|"reply"\s*:')
+
+
+def _looks_like_json(text: str) -> bool:
+    """Whether an LLM answer is (broken) JSON rather than prose."""
+    return _JSON_LIKE_RE.search(text) is not None
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff (1s, 2s, 4s...) capped and jittered by +/-20%.
+
+    Jitter keeps concurrent requests from retrying in lockstep.
+    """
+    return random.uniform(0.8, 1.2) * min(2 ** attempt, MAX_BACKOFF_SECONDS)
 
 
 class GeminiService:
@@ -30,8 +88,16 @@ class GeminiService:
         self.max_retries = max_retries
         self.llm = self._initialize_llm()
 
-    def _initialize_llm(self) -> ChatGoogleGenerativeAI:
+        # The system prompts never change; build their messages once
+        from langchain.schema import SystemMessage
+
+        self._system_msg = SystemMessage(content=SHOPPING_ASSISTANT_SYSTEM_PROMPT)
+        self._sentiment_system_msg = SystemMessage(content=SHOPPING_ASSISTANT_WITH_SENTIMENT_PROMPT)
+
+    def _initialize_llm(self) -> "ChatGoogleGenerativeAI":
         """Initialize the LangChain Gemini chat model."""
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         return ChatGoogleGenerativeAI(
             model=self.model,
             google_api_key=self.api_key,
@@ -40,96 +106,209 @@ class GeminiService:
             convert_system_message_to_human=True,  # Gemini requires this
         )
 
-    async def generate_response(
+    def _build_messages(
         self,
         user_query: str,
         product_context: Optional[str] = None,
         conversation_history: Optional[list] = None,
-    ) -> str:
+        system_msg=None,
+    ) -> list:
+        """Build the LangChain message list for a single turn."""
+        from langchain.schema import HumanMessage
+
+        # Start with the cached system prompt (converted to human message by LangChain)
+        messages = [system_msg or self._system_msg]
+
+        # Add conversation history if provided
+        if conversation_history:
+            messages.extend(conversation_history)
+
+        # Add current user query with optional product context
+        user_message = create_user_message_with_context(user_query, product_context)
+        messages.append(HumanMessage(content=user_message))
+        return messages
+
+    async def _astream(self, messages: list) -> AsyncIterator[str]:
+        """Yield non-empty text chunks from Gemini as they arrive."""
+        async for chunk in self.llm.astream(messages):
+            if chunk.content:
+                yield chunk.content
+
+    async def stream_response(
+        self,
+        user_query: str,
+        product_context: Optional[str] = None,
+        conversation_history: Optional[list] = None,
+    ) -> AsyncIterator[str]:
         """
-        Generate a response to user query using Gemini.
+        Stream a response to user query from Gemini, chunk by chunk.
+
+        Streams are not retried. If Gemini fails before producing any text the
+        fallback response is yielded instead; a failure mid-stream ends it.
 
         Args:
             user_query: The user's message/question
             product_context: Optional product information to provide context
             conversation_history: Optional list of previous messages for context
 
-        Returns:
-            AI-generated response as a string
+        Yields:
+            Text chunks of the AI-generated response
         """
-        for attempt in range(self.max_retries):
-            try:
-                # Build messages list
-                messages = []
-
-                # Add system prompt (converted to human message by LangChain)
-                messages.append(SystemMessage(content=SHOPPING_ASSISTANT_SYSTEM_PROMPT))
+        messages = self._build_messages(user_query, product_context, conversation_history)
+        produced = False
+        try:
+            async for text in self._astream(messages):
+                produced = True
+                yield text
+        except Exception as e:
+            logger.warning("Error streaming response: %s", e)
 
-                # Add conversation history if provided
-                if conversation_history:
-                    messages.extend(conversation_history)
+        if not produced:
+            yield self._get_fallback_response(user_query)
 
-                # Add current user query with optional product context
-                user_message = create_user_message_with_context(user_query, product_context)
-                messages.append(HumanMessage(content=user_message))
+    async def _generate(self, messages: list) -> Optional[str]:
+        """
+        Run one non-streaming Gemini call with retries.
 
-                # Generate response
-                response = await self.llm.ainvoke(messages)
-                response_content = response.content.strip() if response.content else ""
+        Returns:
+            The response text, or None when every attempt failed
+        """
+        for attempt in range(self.max_retries):
+            try:
+                # Generate response by collecting the streamed chunks
+                chunks = [text async for text in self._astream(messages)]
+                response_content = "".join(chunks).strip()
 
                 # Check if response is empty
                 if not response_content:
                     if attempt < self.max_retries - 1:
-                        print(
-                            f"⚠️  Received empty response from Gemini "
-                            f"(attempt {attempt + 1}/{self.max_retries})"
+                        # Wait before retrying with jittered exponential backoff
+                        wait_time = _backoff_delay(attempt)
+                        logger.warning(
+                            "Received empty response from Gemini (attempt %d/%d); "
+                            "retrying in %.1f seconds",
+                            attempt + 1, self.max_retries, wait_time,
                         )
-                        # Wait before retrying with exponential backoff
-                        wait_time = 2 ** attempt  # 1s, 2s, 4s...
-                        print(f"   Retrying in {wait_time} seconds...")
                         await asyncio.sleep(wait_time)
                         continue
                     else:
-                        # All retries exhausted, return fallback
-                        print(
-                            "ℹ️  All retry attempts completed. "
-                            "Using fallback response for better UX."
+                        # All retries exhausted, caller uses the fallback
+                        logger.info(
+                            "All retry attempts completed. Using fallback response."
                         )
-                        return self._get_fallback_response(user_query)
+                        return None
 
                 return response_content
 
             except Exception as e:
-                # Log error and return user-friendly message
-                error_msg = (
-                    f"⚠️  Error generating response "
-                    f"(attempt {attempt + 1}/{self.max_retries}): {str(e)}"
+                # Log error; the caller falls back to a user-friendly message
+                logger.warning(
+                    "Error generating response (attempt %d/%d): %s",
+                    attempt + 1, self.max_retries, e,
                 )
-                print(error_msg)
+                if not isinstance(e, _retryable_errors()):
+                    logger.info("Non-retriable error. Using fallback response.")
+                    return None
                 if attempt < self.max_retries - 1:
-                    # Wait before retrying with exponential backoff
-                    wait_time = 2 ** attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    # Wait before retrying with jittered exponential backoff
+                    wait_time = _backoff_delay(attempt)
+                    logger.info("Retrying in %.1f seconds", wait_time)
                     await asyncio.sleep(wait_time)
                     continue
                 else:
-                    print(
-                        "ℹ️  All retry attempts completed. "
-                        "Using fallback response for better UX."
+                    logger.info(
+                        "All retry attempts completed. Using fallback response."
                     )
-                    return self._get_fallback_response(user_query)
+                    return None
 
         # Should not reach here, but just in case
-        return self._get_fallback_response(user_query)
+        return None
+
+    async def generate_response(
+        self,
+        user_query: str,
+        product_context: Optional[str] = None,
+        conversation_history: Optional[list] = None,
+    ) -> str:
+        """
+        Generate a response to user query using Gemini.
+
+        Args:
+            user_query: The user's message/question
+            product_context: Optional product information to provide context
+            conversation_history: Optional list of previous messages for context
+
+        Returns:
+            AI-generated response as a string
+        """
+        messages = self._build_messages(user_query, product_context, conversation_history)
+        response_content = await self._generate(messages)
+        return response_content or self._get_fallback_response(user_query)
+
+    async def generate_response_with_sentiment(
+        self,
+        user_query: str,
+        product_context: Optional[str] = None,
+        conversation_history: Optional[list] = None,
+    ) -> Tuple[str, Optional[List[Dict]]]:
+        """
+        Generate a response and the message's feature sentiment in one call.
+
+        Saves the separate sentiment analysis round-trip per chat turn.
+
+        Args:
+            user_query: The user's message/question
+            product_context: Optional product information to provide context
+            conversation_history: Optional list of previous messages for context
+
+        Returns:
+            Tuple of (response text, sentiment features). Features are None
+            when Gemini failed or did not return the expected JSON envelope,
+            so the caller can fall back to the standalone sentiment analyzer.
+        """
+        from .sentiment_analyzer import parse_llm_json
+
+        messages = self._build_messages(
+            user_query, product_context, conversation_history,
+            system_msg=self._sentiment_system_msg,
+        )
+        response_content = await self._generate(messages)
+        if not response_content:
+            return self._get_fallback_response(user_query), None
+
+        try:
+            envelope = parse_llm_json(response_content)
+            reply = envelope["reply"].strip()
+        except Exception as e:
+            logger.warning("Combined response was not a valid JSON envelope: %s", e)
+            # A broken envelope must not reach the user as raw JSON; plain
+            # prose (the model ignoring the format) is still a usable reply
+            if _looks_like_json(response_content):
+                return self._get_fallback_response(user_query), None
+            return response_content.strip(), None
+
+        if not reply:
+            return self._get_fallback_response(user_query), None
+
+        sentiment = envelope.get("sentiment")
+        features = sentiment.get("features") if isinstance(sentiment, dict) else None
+        if not isinstance(features, list):
+            logger.warning("Combined response is missing sentiment features")
+            return reply, None
+        features = [
+            f for f in features
+            if isinstance(f, dict) and _SENTIMENT_FEATURE_KEYS <= f.keys()
+        ]
+        return reply, features
+
+    def is_fallback_response(self, user_query: str, response: str) -> bool:
+        """Whether `response` is the canned fallback rather than a Gemini answer."""
+        return response == self._get_fallback_response(user_query)
 
     def _get_fallback_response(self, user_query: str) -> str:
         """Provide a fallback response when Gemini fails."""
         # Check if query is about product availability or stock
-        query_lower = user_query.lower()
-        stock_keywords = [
-            'stock', 'available', 'in stock', 'buy', 'purchase', 'get'
-        ]
-        if any(keyword in query_lower for keyword in stock_keywords):
+        if _STOCK_RE.search(user_query):
             return (
                 "I apologize, but I'm currently unable to check our "
                 "inventory status. Our stock information may be temporarily "
@@ -160,12 +339,16 @@ class GeminiService:
 
 # Singleton instance
 _gemini_service: Optional[GeminiService] = None
+_gemini_service_lock = threading.Lock()
 
 
 def get_gemini_service(api_key: Optional[str] = None) -> Optional[GeminiService]:
     """
     Get or create the Gemini service singleton.
 
+    Uses double-checked locking so concurrent first calls build the LangChain
+    client only once.
+
     Args:
         api_key: Optional API key override
 
@@ -175,10 +358,12 @@ def get_gemini_service(api_key: Optional[str] = None) -> Optional[GeminiService]
     global _gemini_service
 
     if _gemini_service is None:
-        try:
-            _gemini_service = GeminiService(api_key=api_key)
-        except ValueError as e:
-            print(f"Failed to initialize Gemini service: {e}")
-            return None
+        with _gemini_service_lock:
+            if _gemini_service is None:
+                try:
+                    _gemini_service = GeminiService(api_key=api_key)
+                except ValueError as e:
+                    logger.error("Failed to initialize Gemini service: %s", e)
+                    return None
 
     return _gemini_service
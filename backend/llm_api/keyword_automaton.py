@@ -0,0 +1,35 @@
+"""Multi-keyword substring matching backed by an Aho-Corasick automaton."""
+from typing import Dict, Iterable, Set, Tuple
+
+import ahocorasick
+
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher reporting which (kind, keyword) pairs occur in a text.
+
+    Matches substrings anywhere in the text, like `keyword in text`, but scans
+    the text once instead of once per keyword.
+    """
+
+    def __init__(self, entries: Dict[str, Iterable[str]]):
+        self._automaton = ahocorasick.Automaton()
+        for kind, keywords in entries.items():
+            for kw in keywords:
+                kinds = self._automaton.get(kw, ())
+                self._automaton.add_word(kw, kinds + ((kind, kw),))
+        self._automaton.make_automaton()
+
+    def matched_values(self, text: str) -> Set[Tuple[str, str]]:
+        """Return the set of (kind, keyword) pairs found in `text`."""
+        found: Set[Tuple[str, str]] = set()
+        for _, values in self._automaton.iter(text):
+            found.update(values)
+        return found
+
+    def first_positions(self, text: str) -> Dict[Tuple[str, str], int]:
+        """Return each matched (kind, keyword) pair with its first start offset."""
+        positions: Dict[Tuple[str, str], int] = {}
+        for end, values in self._automaton.iter(text):
+            for kind, kw in values:
+                positions.setdefault((kind, kw), end - len(kw) + 1)
+        return positions
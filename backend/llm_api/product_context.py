@@ -1,111 +1,354 @@
 """Product context building and search for LLM integration."""
 
+import asyncio
+import random
 import re
-from typing import Any, Dict, List
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-
-async def extract_search_criteria(user_query: str) -> Dict[str, Any]:
+from .keyword_automaton import KeywordAutomaton
+
+# Price range patterns, compiled once
+# "under 100000", "less than 50000", "below 80000", "cheaper than 70000"
+_MAX_PRICE_RE = re.compile(r'(?:under|less\s+than|below|cheaper\s+than)\s+(\d+)')
+# "over 50000", "more than 30000", "above 20000"
+_MIN_PRICE_RE = re.compile(r'(?:over|more\s+than|above)\s+(\d+)')
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Greetings / thanks with no shopping intent
+_GREETING_RE = re.compile(
+    r'(?:hi+|hello+|hey+|yo+|thanks?|thank you|good (?:morning|afternoon|evening)|안녕(?:하세요)?)[!.? ]*',
+    re.IGNORECASE,
+)
+# Messages shorter than this with no search criteria are treated as small talk
+_SMALL_TALK_MAX_LENGTH = 12
+
+# Product categories and the query keywords that select them
+CATEGORY_KEYWORDS = {
+    "shoes": ["shoe", "sneaker", "footwear", "running", "boots"],
+    "bags": ["bag", "backpack", "handbag", "purse", "crossbag"],
+    "electronics": ["phone", "headphone", "watch", "gadget", "electronic"],
+    "accessories": ["wallet", "sunglasses", "accessory", "belt"],
+}
+
+# Stored (lowercased) product category values for each detected category
+CATEGORY_DB_VALUES = {
+    "shoes": ["shoes", "sneakers", "boots", "footwear"],
+    "bags": ["bags", "backpacks", "handbags", "purses"],
+    "electronics": ["electronics", "phones", "headphones", "watches", "gadgets"],
+    "accessories": ["accessories", "wallets", "sunglasses", "belts"],
+}
+
+BRANDS = ["adidas", "nike", "29cm", "에이블리", "아디다스"]
+
+STOP_WORDS = frozenset({
+    "i",
+    "need",
+    "want",
+    "looking",
+    "for",
+    "show",
+    "me",
+    "find",
+    "get",
+    "buy",
+    "purchase",
+    "a",
+    "an",
+    "the",
+    "some",
+    "any",
+    "products",
+    "product",
+    "suggest",
+    "recommendation",
+    "help",
+})
+
+# Fields read by build_product_context_for_llm plus those the chat product
+# cards render, already shaped for the API response (`_id` -> string `id`);
+# skips long descriptions, seller/shipping blocks, etc.
+_PRODUCT_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "product_id": 1,
+    "title": 1,
+    "brand": 1,
+    "category": 1,
+    "price": 1,
+    "original_price": 1,
+    "discount_rate": 1,
+    "currency": 1,
+    "stock": 1,
+    "ratings.average": 1,
+    "ratings.count": 1,
+    "images": {"$slice": [{"$ifNull": ["$images", []]}, 1]},
+}
+
+# Fragments of one product line in the LLM product context
+_PRODUCT_LINE_TEMPLATE = "{i}. {title} - {price:,} {currency}"
+_DISCOUNT_TEMPLATE = " ({discount_rate}% OFF, was {original_price:,} {currency})"
+_RATING_TEMPLATE = " - Rating: {average}/5 ({count} reviews)"
+_LOW_STOCK_TEMPLATE = " ⚠️ Only {stock} left!"
+_BRAND_TEMPLATE = " - Brand: {brand}"
+
+# Product count used to pick a random page for unfiltered queries
+_PRODUCT_COUNT_TTL_SECONDS = 60.0
+_product_count: int = 0
+_product_count_expires_at: float = 0.0
+
+# In-process (_id, lowercased title) pairs for the keyword fallback, so it
+# can match titles locally and fetch by _id instead of running a server-side
+# regex scan. Skipped for catalogs too large to hold in memory.
+_TITLE_CACHE_TTL_SECONDS = 300.0
+_TITLE_CACHE_MAX_PRODUCTS = 50_000
+_title_cache: List[Tuple[Any, str]] = []
+_title_cache_expires_at: float = 0.0
+# Reload in progress, shared by every request that finds the cache expired
+_title_cache_loading: Optional["asyncio.Future[List[Tuple[Any, str]]]"] = None
+
+
+def _word_forms(keyword: str) -> Tuple[str, ...]:
+    """Return the singular and plural token forms of a category keyword."""
+    if keyword.endswith("y"):
+        return keyword, keyword[:-1] + "ies"
+    if keyword.endswith(("s", "x", "ch", "sh")):
+        return keyword, keyword + "es"
+    return keyword, keyword + "s"
+
+
+# Query token -> ("category", keyword). Category keywords are whole words, so
+# they are matched per token (with plurals) rather than as substrings, which
+# also stops e.g. "watch" from matching "watching".
+_CATEGORY_TOKENS: Dict[str, Tuple[str, str]] = {
+    form: ("category", kw)
+    for keywords in CATEGORY_KEYWORDS.values()
+    for kw in keywords
+    for form in _word_forms(kw)
+}
+
+# Brands stay substring-matched: Korean names may carry attached particles
+_KEYWORD_AUTOMATON = KeywordAutomaton({"brand": BRANDS})
+
+
+@dataclass(frozen=True, slots=True)
+class QueryCtx:
+    """A user query normalized once and shared by the query analysis helpers."""
+
+    raw: str = field(compare=False)  # equality/hash follow the normalized text
+    lower: str
+    tokens: Tuple[str, ...]
+    keyword_hits: FrozenSet[Tuple[str, str]]  # matched (kind, keyword) pairs
+
+    @classmethod
+    def from_query(cls, user_query: str) -> "QueryCtx":
+        lower = user_query.strip().lower()
+        tokens = tuple(_WORD_RE.findall(lower))
+        hits = _KEYWORD_AUTOMATON.matched_values(lower)
+        hits.update(_CATEGORY_TOKENS[t] for t in tokens if t in _CATEGORY_TOKENS)
+        return cls(
+            raw=user_query,
+            lower=lower,
+            tokens=tokens,
+            keyword_hits=frozenset(hits),
+        )
+
+
+def _as_query_ctx(user_query: Union[str, QueryCtx]) -> QueryCtx:
+    if isinstance(user_query, QueryCtx):
+        return user_query
+    return QueryCtx.from_query(user_query)
+
+
+class SearchCriteria(NamedTuple):
+    """Immutable search criteria extracted from a user query."""
+
+    keywords: Tuple[str, ...]
+    max_price: Optional[int]
+    min_price: Optional[int]
+    category: Optional[str]
+    brand: Optional[str]
+
+
+def extract_search_criteria(user_query: Union[str, QueryCtx]) -> SearchCriteria:
     """
     Extract search criteria from user query.
 
+    Results are cached per normalized query, so repeated messages skip the
+    regex and keyword matching entirely.
+
     Args:
-        user_query: User's search query
+        user_query: User's search query (raw or already normalized)
 
     Returns:
-        Dictionary with search criteria (keywords, price, category, etc.)
+        SearchCriteria with keywords, price range, category and brand
     """
-    query_lower = user_query.lower()
-    criteria = {
-        "keywords": [],
-        "max_price": None,
-        "min_price": None,
-        "category": None,
-        "brand": None,
-    }
+    return _extract_search_criteria(_as_query_ctx(user_query))
+
+
+@lru_cache(maxsize=4096)
+def _extract_search_criteria(ctx: QueryCtx) -> SearchCriteria:
+    query_lower = ctx.lower
+    keywords: List[str] = []
+    category = None
+    brand = None
 
     # Extract price range
-    # Pattern: "under 100000", "less than 50000", "below 80000"
-    price_patterns = [
-        r'under\s+(\d+)',
-        r'less\s+than\s+(\d+)',
-        r'below\s+(\d+)',
-        r'cheaper\s+than\s+(\d+)',
-    ]
-    for pattern in price_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            criteria["max_price"] = int(match.group(1))
-            break
+    match = _MAX_PRICE_RE.search(query_lower)
+    max_price = int(match.group(1)) if match else None
 
-    # Pattern: "over 50000", "more than 30000", "above 20000"
-    min_price_patterns = [
-        r'over\s+(\d+)',
-        r'more\s+than\s+(\d+)',
-        r'above\s+(\d+)',
-    ]
-    for pattern in min_price_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            criteria["min_price"] = int(match.group(1))
-            break
+    match = _MIN_PRICE_RE.search(query_lower)
+    min_price = int(match.group(1)) if match else None
+
+    # Detect product categories and brands (matched once in QueryCtx)
+    matched = ctx.keyword_hits
 
-    # Detect product categories
-    category_keywords = {
-        "shoes": ["shoe", "sneaker", "footwear", "running", "boots"],
-        "bags": ["bag", "backpack", "handbag", "purse", "crossbag"],
-        "electronics": ["phone", "headphone", "watch", "gadget", "electronic"],
-        "accessories": ["wallet", "sunglasses", "accessory", "belt"],
-    }
-
-    for category, keywords in category_keywords.items():
-        if any(kw in query_lower for kw in keywords):
-            criteria["category"] = category
-            criteria["keywords"].extend([kw for kw in keywords if kw in query_lower])
+    for candidate, category_keywords in CATEGORY_KEYWORDS.items():
+        if any(("category", kw) in matched for kw in category_keywords):
+            category = candidate
+            keywords.extend([kw for kw in category_keywords if ("category", kw) in matched])
             break
 
-    # Detect brands
-    brands = ["adidas", "nike", "29cm", "에이블리", "아디다스"]
-    for brand in brands:
-        if brand in query_lower:
-            criteria["brand"] = brand
+    for candidate in BRANDS:
+        if ("brand", candidate) in matched:
+            brand = candidate
             break
 
     # General keywords (if no specific category found)
-    if not criteria["keywords"]:
+    if not keywords:
         # Extract meaningful words (exclude common words)
-        stop_words = {
-            "i",
-            "need",
-            "want",
-            "looking",
-            "for",
-            "show",
-            "me",
-            "find",
-            "get",
-            "buy",
-            "purchase",
-            "a",
-            "an",
-            "the",
-            "some",
-            "any",
-            "products",
-            "product",
-            "suggest",
-            "recommendation",
-            "help",
-        }
-        words = re.findall(r'\b\w+\b', query_lower)
-        criteria["keywords"] = [w for w in words if w not in stop_words and len(w) > 2]
-
-    return criteria
+        keywords = [w for w in ctx.tokens if w not in STOP_WORDS and len(w) > 2]
+
+    return SearchCriteria(tuple(keywords), max_price, min_price, category, brand)
+
+
+def is_small_talk(user_query: Union[str, QueryCtx]) -> bool:
+    """
+    Cheaply detect conversational messages with no product intent.
+
+    Greetings, and very short messages without any category, brand, price or
+    meaningful keyword, don't need a product search or product context.
+
+    Args:
+        user_query: User's message (raw or already normalized)
+
+    Returns:
+        True if the product search can be skipped
+    """
+    ctx = _as_query_ctx(user_query)
+    text = ctx.lower
+    if _GREETING_RE.fullmatch(text):
+        return True
+    if len(text) >= _SMALL_TALK_MAX_LENGTH:
+        return False
+    if ctx.keyword_hits or _MAX_PRICE_RE.search(text) or _MIN_PRICE_RE.search(text):
+        return False
+    return not any(w not in STOP_WORDS and len(w) > 2 for w in ctx.tokens)
+
+
+async def _get_product_count(db: AsyncIOMotorDatabase) -> int:
+    """Return the (estimated) products count, refreshed at most every TTL."""
+    global _product_count, _product_count_expires_at
+
+    now = time.monotonic()
+    if now >= _product_count_expires_at:
+        _product_count = await db.products.estimated_document_count()
+        _product_count_expires_at = now + _PRODUCT_COUNT_TTL_SECONDS
+    return _product_count
+
+
+async def _aggregate_products(
+    db: AsyncIOMotorDatabase,
+    match: Dict[str, Any],
+    limit: int,
+    *,
+    sort: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+) -> List[Dict[str, Any]]:
+    """Run match -> sort -> skip -> limit -> project as one aggregation.
+
+    Documents come back in response shape (see `_PRODUCT_PROJECTION`).
+    """
+    pipeline: List[Dict[str, Any]] = [{"$match": match}]
+    if sort:
+        pipeline.append({"$sort": sort})
+    if skip:
+        pipeline.append({"$skip": skip})
+    pipeline.append({"$limit": limit})
+    pipeline.append({"$project": _PRODUCT_PROJECTION})
+    return await db.products.aggregate(pipeline).to_list(limit)
+
+
+async def _load_title_cache(db: AsyncIOMotorDatabase) -> List[Tuple[Any, str]]:
+    """Reload the (_id, lowercased title) pairs from MongoDB."""
+    global _title_cache, _title_cache_expires_at
+
+    if await _get_product_count(db) > _TITLE_CACHE_MAX_PRODUCTS:
+        titles = []
+    else:
+        docs = await db.products.find({}, {"title": 1}).to_list(_TITLE_CACHE_MAX_PRODUCTS)
+        titles = [(doc["_id"], str(doc.get("title", "")).lower()) for doc in docs]
+    _title_cache = titles
+    _title_cache_expires_at = time.monotonic() + _TITLE_CACHE_TTL_SECONDS
+    return titles
+
+
+def _clear_title_cache_loading(_: "asyncio.Future") -> None:
+    global _title_cache_loading
+    _title_cache_loading = None
+
+
+async def _get_title_cache(db: AsyncIOMotorDatabase) -> List[Tuple[Any, str]]:
+    """Return cached (_id, lowercased title) pairs, reloaded at most every TTL."""
+    global _title_cache_loading
+
+    if time.monotonic() < _title_cache_expires_at:
+        return _title_cache
+
+    # Requests arriving while the cache reloads wait for that one reload
+    if _title_cache_loading is None:
+        _title_cache_loading = asyncio.ensure_future(_load_title_cache(db))
+        _title_cache_loading.add_done_callback(_clear_title_cache_loading)
+    return await asyncio.shield(_title_cache_loading)
+
+
+def _match_titles(titles: List[Tuple[Any, str]], keyword: str, limit: int) -> List[Any]:
+    """Return the _ids of up to `limit` titles containing `keyword`."""
+    ids = []
+    for _id, title in titles:
+        if keyword in title:
+            ids.append(_id)
+            if len(ids) >= limit:
+                break
+    return ids
+
+
+async def _find_by_title_keyword(
+    db: AsyncIOMotorDatabase,
+    keyword: str,
+    limit: int
+) -> List[Dict[str, Any]]:
+    """Find products whose title contains ``keyword`` (case-insensitive)."""
+    titles = await _get_title_cache(db)
+    if not titles:
+        # Catalog too large (or empty) for the local cache: let Mongo scan it
+        return await _aggregate_products(
+            db, {"title": {"$regex": re.escape(keyword), "$options": "i"}}, limit
+        )
+
+    # Scanning up to _TITLE_CACHE_MAX_PRODUCTS titles would stall the event loop
+    ids = await asyncio.to_thread(_match_titles, titles, keyword, limit)
+    if not ids:
+        return []
+    return await _aggregate_products(db, {"_id": {"$in": ids}}, limit)
 
 
 async def search_products_by_query(
-    user_query: str,
+    user_query: Union[str, QueryCtx],
     db: AsyncIOMotorDatabase,
     limit: int = 5
 ) -> List[Dict[str, Any]]:
@@ -113,7 +356,7 @@ async def search_products_by_query(
     Search products based on user query.
 
     Args:
-        user_query: User's search query
+        user_query: User's search query (raw or already normalized)
         db: MongoDB database instance
         limit: Maximum number of products to return
 
@@ -121,77 +364,104 @@ async def search_products_by_query(
         List of product documents
     """
     # Extract search criteria
-    criteria = await extract_search_criteria(user_query)
+    criteria = extract_search_criteria(user_query)
 
     # Build MongoDB query
     mongo_query = {}
 
     # Price filtering
     price_filter = {}
-    if criteria["max_price"]:
-        price_filter["$lte"] = criteria["max_price"]
-    if criteria["min_price"]:
-        price_filter["$gte"] = criteria["min_price"]
+    if criteria.max_price:
+        price_filter["$lte"] = criteria.max_price
+    if criteria.min_price:
+        price_filter["$gte"] = criteria.min_price
     if price_filter:
         mongo_query["price"] = price_filter
 
-    # Category filtering (search in category array or title)
-    if criteria["category"] or criteria["keywords"]:
-        search_terms = []
-
-        if criteria["category"]:
-            search_terms.append(criteria["category"])
-
-        if criteria["keywords"]:
-            search_terms.extend(criteria["keywords"][:3])  # Limit to top 3 keywords
+    # Category filtering via the lowercased category field; free-text
+    # keywords (no known category) go through the products text index
+    if criteria.category:
+        mongo_query["category_lc"] = {"$in": CATEGORY_DB_VALUES[criteria.category]}
+    elif criteria.keywords:
+        # Search title, description, category and tags (top 3 keywords)
+        mongo_query["$text"] = {"$search": " ".join(criteria.keywords[:3])}
 
-        # Search in title, description, category, or tags
-        mongo_query["$or"] = []
-        for term in search_terms:
-            mongo_query["$or"].extend([
-                {"title": {"$regex": term, "$options": "i"}},
-                {"description": {"$regex": term, "$options": "i"}},
-                {"category": {"$regex": term, "$options": "i"}},
-                {"tags": {"$regex": term, "$options": "i"}},
-            ])
-
-    # Brand filtering
-    if criteria["brand"]:
-        mongo_query["brand"] = {"$regex": criteria["brand"], "$options": "i"}
+    # Brand filtering (brands are matched lowercase)
+    if criteria.brand:
+        mongo_query["brand_lc"] = criteria.brand
 
     # If no specific criteria OR only generic keywords, return random products
     has_specific_criteria = bool(
-        criteria["category"]
-        or criteria["brand"]
-        or criteria["max_price"]
-        or criteria["min_price"]
-        or (criteria["keywords"] and len(criteria["keywords"]) > 0)
+        criteria.category
+        or criteria.brand
+        or criteria.max_price
+        or criteria.min_price
+        or (criteria.keywords and len(criteria.keywords) > 0)
     )
 
     if not mongo_query or not has_specific_criteria:
-        # Use aggregation to get random products
-        pipeline = [
-            {"$sample": {"size": limit}},
-            {"$limit": limit}
-        ]
-        products = await db.products.aggregate(pipeline).to_list(None)
+        # Return a random window of products along the _id index
+        product_count = await _get_product_count(db)
+        skip = random.randint(0, max(0, product_count - limit))
+        products = await _aggregate_products(db, {}, limit, sort={"_id": 1}, skip=skip)
     else:
-        # Query with filters and sort by rating/discount
-        products = await db.products.find(mongo_query).sort([
-            ("ratings.average", -1),  # Prioritize higher rated
-            ("discount_rate", -1),    # Then higher discounts
-        ]).limit(limit).to_list(None)
+        # Query with filters and sort by relevance, then rating/discount
+        sort: Dict[str, Any] = {}
+        if "$text" in mongo_query:
+            sort["score"] = {"$meta": "textScore"}
+        sort["ratings.average"] = -1  # Prioritize higher rated
+        sort["discount_rate"] = -1    # Then higher discounts
+        products = await _aggregate_products(db, mongo_query, limit, sort=sort)
 
         # If no results with filters, fall back to keywords only
-        if not products and criteria["keywords"]:
-            fallback_query = {"$or": [
-                {"title": {"$regex": criteria["keywords"][0], "$options": "i"}},
-            ]}
-            products = await db.products.find(fallback_query).limit(limit).to_list(None)
+        if not products and criteria.keywords:
+            products = await _find_by_title_keyword(db, criteria.keywords[0], limit)
 
     return products
 
 
+def _format_product_line(i: int, product: Dict[str, Any]) -> str:
+    """Render one numbered product line of the LLM product context."""
+    currency = product.get('currency', 'KRW')
+    parts = [_PRODUCT_LINE_TEMPLATE.format(
+        i=i,
+        title=product.get('title', 'Unknown Product'),
+        price=product.get('price', 0),
+        currency=currency,
+    )]
+
+    # Add discount info
+    original_price = product.get('original_price')
+    discount_rate = product.get('discount_rate', 0)
+    if original_price and discount_rate > 0:
+        parts.append(_DISCOUNT_TEMPLATE.format(
+            discount_rate=discount_rate, original_price=original_price, currency=currency,
+        ))
+
+    # Add rating
+    ratings = product.get('ratings', {})
+    if isinstance(ratings, dict):
+        avg_rating = ratings.get('average', 0)
+        if avg_rating > 0:
+            parts.append(_RATING_TEMPLATE.format(
+                average=avg_rating, count=ratings.get('count', 0),
+            ))
+
+    # Add stock warning
+    stock = product.get('stock', 0)
+    if stock > 0 and stock < 10:
+        parts.append(_LOW_STOCK_TEMPLATE.format(stock=stock))
+    elif stock == 0:
+        parts.append(" ❌ Out of stock")
+
+    # Add category/brand
+    brand = product.get('brand')
+    if brand:
+        parts.append(_BRAND_TEMPLATE.format(brand=brand))
+
+    return "".join(parts)
+
+
 async def build_product_context_for_llm(products: List[Dict[str, Any]]) -> str:
     """
     Format products into concise text for Gemini.
@@ -205,54 +475,19 @@ async def build_product_context_for_llm(products: List[Dict[str, Any]]) -> str:
     if not products:
         return "Note: No specific products match the criteria, but our catalog has many items available. Suggest the user browse our catalog or refine their search."
 
-    context_lines = ["Here are the available products:\n"]
-
-    for i, product in enumerate(products, 1):
-        title = product.get('title', 'Unknown Product')
-        price = product.get('price', 0)
-        currency = product.get('currency', 'KRW')
-        original_price = product.get('original_price')
-        discount_rate = product.get('discount_rate', 0)
-
-        # Format price
-        price_str = f"{price:,} {currency}"
-
-        # Build product line
-        line = f"{i}. {title} - {price_str}"
-
-        # Add discount info
-        if original_price and discount_rate > 0:
-            line += f" ({discount_rate}% OFF, was {original_price:,} {currency})"
-
-        # Add rating
-        ratings = product.get('ratings', {})
-        if isinstance(ratings, dict):
-            avg_rating = ratings.get('average', 0)
-            review_count = ratings.get('count', 0)
-            if avg_rating > 0:
-                line += f" - Rating: {avg_rating}/5 ({review_count} reviews)"
-
-        # Add stock warning
-        stock = product.get('stock', 0)
-        if stock > 0 and stock < 10:
-            line += f" ⚠️ Only {stock} left!"
-        elif stock == 0:
-            line += " ❌ Out of stock"
-
-        # Add category/brand
-        brand = product.get('brand')
-        if brand:
-            line += f" - Brand: {brand}"
-
-        context_lines.append(line)
-
-    return "\n".join(context_lines)
+    return "\n".join([
+        "Here are the available products:\n",
+        *(_format_product_line(i, product) for i, product in enumerate(products, 1)),
+    ])
 
 
 def format_products_for_response(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Format products for API response (convert ObjectId to string, etc.).
 
+    Products from `search_products_by_query` are already in response shape
+    and pass through unchanged.
+
     Args:
         products: List of product documents
 
@@ -44,6 +44,26 @@ You: "Great choice! I found Product #1 (Adidas Running Shoes) which would be per
 Remember: You're here to help users find the perfect products and have a great shopping experience!"""
 
 
+# Shopping prompt variant that also returns the turn's feature sentiment, so a
+# single Gemini call replaces the separate sentiment analysis request
+SHOPPING_ASSISTANT_WITH_SENTIMENT_PROMPT = SHOPPING_ASSISTANT_SYSTEM_PROMPT + """
+
+Response format:
+Besides replying, analyze the user's latest message for the product features they mention (size, color, material, brand, price, trend, durability, shipping), their sentiment about each (positive or negative) and a score from -1.0 (very negative) to 1.0 (very positive).
+
+Return ONLY a JSON object with this exact structure:
+{
+  "reply": "your response to the user",
+  "sentiment": {
+    "features": [
+      {"feature": "size", "sentence": "the exact sentence mentioning this feature", "sentiment": "positive", "score": 0.8}
+    ]
+  }
+}
+
+If no product features are mentioned, use: "sentiment": {"features": []}"""
+
+
 def create_user_message_with_context(user_query: str, product_context: str = None) -> str:
     """Create a user message with optional product context."""
     if product_context:
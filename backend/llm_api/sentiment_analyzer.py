@@ -7,10 +7,16 @@ Analyzes user messages to identify:
 """
 import re
 import asyncio
+import logging
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
 from typing import Dict, List, Optional
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import SystemMessage, HumanMessage
-import json
+import orjson
+
+from .keyword_automaton import KeywordAutomaton
+
+logger = logging.getLogger(__name__)
 
 
 # Feature keywords mapping
@@ -25,6 +31,47 @@ FEATURE_KEYWORDS = {
     "shipping": ["shipping", "delivery", "배송", "빠른"],
 }
 
+# Sentiment words for the keyword-based fallback (substring matches)
+POSITIVE_WORDS = frozenset([
+    "good", "great", "excellent", "perfect", "love", "amazing",
+    "좋", "완벽", "최고", "훌륭",
+])
+NEGATIVE_WORDS = frozenset([
+    "bad", "poor", "terrible", "hate", "disappointing", "worst",
+    "나쁜", "별로", "실망", "안좋",
+])
+
+# Greetings / acknowledgements that never carry feature sentiment
+GREETINGS = frozenset([
+    "hi", "hello", "hey", "yo", "thanks", "thank you", "ok", "okay", "bye",
+    "good morning", "good afternoon", "good evening",
+    "안녕", "안녕하세요", "감사합니다", "고마워",
+])
+# Messages shorter than this are only analyzed if they name a feature
+MIN_SENTIMENT_TEXT_LENGTH = 12
+
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]')
+_TRAILING_PUNCTUATION = "!.?~ "
+
+# Body of the first ```json / ``` fenced block in an LLM response
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+
+# Feature keywords and sentiment words matched in a single pass
+_KEYWORD_AUTOMATON = KeywordAutomaton({
+    **FEATURE_KEYWORDS,
+    "positive": POSITIVE_WORDS,
+    "negative": NEGATIVE_WORDS,
+})
+
+# Feature order and per-feature keyword priority, used to turn automaton hits
+# into "feature -> first listed keyword" without rescanning keyword lists
+_FEATURE_ORDER = {feature: i for i, feature in enumerate(FEATURE_KEYWORDS)}
+_FEATURE_KEYWORD_RANK = {
+    (feature, kw): i
+    for feature, keywords in FEATURE_KEYWORDS.items()
+    for i, kw in enumerate(keywords)
+}
+
 SENTIMENT_ANALYSIS_PROMPT = """You are a sentiment analysis expert for e-commerce product reviews.
 
 Analyze the user's message and extract:
@@ -77,17 +124,61 @@ Response: {"features": []}
 Now analyze this message:"""
 
 
+def should_analyze_sentiment(user_message: str) -> bool:
+    """Cheaply decide whether a message can carry feature sentiment.
+
+    Greetings, and short messages that mention no feature keyword, are
+    skipped without an LLM call.
+
+    Args:
+        user_message: The user's message
+
+    Returns:
+        True if the message is worth analyzing
+    """
+    text = user_message.strip().lower()
+    if text.rstrip(_TRAILING_PUNCTUATION) in GREETINGS:
+        return False
+    if len(text) >= MIN_SENTIMENT_TEXT_LENGTH:
+        return True
+    return any(
+        kind in FEATURE_KEYWORDS
+        for kind, _ in _KEYWORD_AUTOMATON.matched_values(text)
+    )
+
+
+def parse_llm_json(content: str):
+    """Parse a JSON LLM response, unwrapping a markdown code fence if present.
+
+    Raises:
+        orjson.JSONDecodeError: If the content is not valid JSON
+    """
+    fenced = _FENCE_RE.search(content)
+    if fenced:
+        content = fenced.group(1)
+    return orjson.loads(content)
+
+
 class SentimentAnalyzer:
     """Analyzes user messages for product feature sentiment."""
     
-    def __init__(self, gemini_api_key: str, max_retries: int = 3):
+    def __init__(self, gemini_api_key: str, max_retries: int = 3, cache_size: int = 2048):
         """Initialize the sentiment analyzer with Gemini.
         
         Args:
             gemini_api_key: Google Gemini API key
             max_retries: Maximum number of retries for empty responses (default: 3)
+            cache_size: Maximum number of analyzed messages kept in the LRU cache
         """
         self.max_retries = max_retries
+        self.cache_size = cache_size
+        # Normalized message -> LLM features, most recently used last
+        self._cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        # LangChain is imported here, not at module level, so importing the
+        # app doesn't pay for it (as in GeminiService)
+        from langchain.schema import SystemMessage
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.0-flash-exp",
             google_api_key=gemini_api_key,
@@ -95,6 +186,8 @@ class SentimentAnalyzer:
             max_output_tokens=1000,
             convert_system_message_to_human=True,
         )
+        # The system prompt never changes; build its message once
+        self._system_msg = SystemMessage(content=SENTIMENT_ANALYSIS_PROMPT)
     
     async def analyze_message(self, user_message: str) -> List[Dict]:
         """
@@ -115,11 +208,22 @@ class SentimentAnalyzer:
                 ...
             ]
         """
+        if not should_analyze_sentiment(user_message):
+            return []
+
+        cache_key = user_message.strip().lower()
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return [dict(feature) for feature in cached]
+
+        from langchain.schema import HumanMessage
+
         for attempt in range(self.max_retries):
             try:
                 # Build prompt
                 messages = [
-                    SystemMessage(content=SENTIMENT_ANALYSIS_PROMPT),
+                    self._system_msg,
                     HumanMessage(content=user_message)
                 ]
                 
@@ -132,65 +236,60 @@ class SentimentAnalyzer:
                 # Check if response is empty
                 if not content:
                     if attempt < self.max_retries - 1:
-                        print(
-                            f"⚠️  Empty sentiment analysis response "
-                            f"(attempt {attempt + 1}/{self.max_retries})"
-                        )
                         wait_time = 2 ** attempt
-                        print(f"   Retrying in {wait_time} seconds...")
+                        logger.warning(
+                            "Empty sentiment analysis response (attempt %d/%d); "
+                            "retrying in %d seconds",
+                            attempt + 1, self.max_retries, wait_time,
+                        )
                         await asyncio.sleep(wait_time)
                         continue
                     else:
-                        print(
-                            "ℹ️  All retry attempts completed. "
-                            "Using keyword-based sentiment analysis."
+                        logger.info(
+                            "All retry attempts completed. Using keyword-based sentiment analysis."
                         )
                         return self._keyword_based_analysis(user_message)
                 
                 # Extract JSON from markdown code blocks if present
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
+                result = parse_llm_json(content)
+                features = result.get("features", [])
                 
-                result = json.loads(content)
+                # Only successful LLM results are cached, never the fallback
+                self._cache[cache_key] = [dict(feature) for feature in features]
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
                 
-                return result.get("features", [])
+                return features
                 
-            except json.JSONDecodeError as e:
-                error_msg = (
-                    f"⚠️  Failed to parse sentiment JSON "
-                    f"(attempt {attempt + 1}/{self.max_retries}): {e}"
+            except orjson.JSONDecodeError as e:
+                logger.warning(
+                    "Failed to parse sentiment JSON (attempt %d/%d): %s; raw response: %s",
+                    attempt + 1, self.max_retries, e,
+                    response.content if 'response' in locals() else 'N/A',
                 )
-                print(error_msg)
-                raw = response.content if 'response' in locals() else 'N/A'
-                print(f"   Raw response: {raw}")
                 if attempt < self.max_retries - 1:
                     wait_time = 2 ** attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    logger.info("Retrying in %d seconds", wait_time)
                     await asyncio.sleep(wait_time)
                     continue
                 else:
-                    print(
-                        "ℹ️  All retry attempts completed. "
-                        "Using keyword-based sentiment analysis."
+                    logger.info(
+                        "All retry attempts completed. Using keyword-based sentiment analysis."
                     )
                     return self._keyword_based_analysis(user_message)
             except Exception as e:
-                error_msg = (
-                    f"⚠️  Error in sentiment analysis "
-                    f"(attempt {attempt + 1}/{self.max_retries}): {e}"
+                logger.warning(
+                    "Error in sentiment analysis (attempt %d/%d): %s",
+                    attempt + 1, self.max_retries, e,
                 )
-                print(error_msg)
                 if attempt < self.max_retries - 1:
                     wait_time = 2 ** attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    logger.info("Retrying in %d seconds", wait_time)
                     await asyncio.sleep(wait_time)
                     continue
                 else:
-                    print(
-                        "ℹ️  All retry attempts completed. "
-                        "Using keyword-based sentiment analysis."
+                    logger.info(
+                        "All retry attempts completed. Using keyword-based sentiment analysis."
                     )
                     return self._keyword_based_analysis(user_message)
         
@@ -206,58 +305,82 @@ class SentimentAnalyzer:
         """
         message_lower = user_message.lower()
         features = []
-        
-        # Positive and negative sentiment words
-        positive_words = ["good", "great", "excellent", "perfect", "love", "amazing", 
-                         "좋", "완벽", "최고", "훌륭"]
-        negative_words = ["bad", "poor", "terrible", "hate", "disappointing", "worst",
-                         "나쁜", "별로", "실망", "안좋"]
-        
-        # Check each feature
-        for feature, keywords in FEATURE_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    # Extract sentence containing the keyword
-                    sentences = re.split(r'[.!?]', user_message)
-                    relevant_sentence = next(
-                        (s for s in sentences if keyword in s.lower()),
-                        user_message
-                    ).strip()
-                    
-                    # Determine sentiment
-                    has_positive = any(pos in message_lower for pos in positive_words)
-                    has_negative = any(neg in message_lower for neg in negative_words)
-                    
-                    if has_positive and not has_negative:
-                        sentiment = "positive"
-                        score = 0.7
-                    elif has_negative and not has_positive:
-                        sentiment = "negative"
-                        score = -0.7
-                    else:
-                        sentiment = "positive"
-                        score = 0.5  # Neutral default
-                    
-                    features.append({
-                        "feature": feature,
-                        "sentence": relevant_sentence,
-                        "sentiment": sentiment,
-                        "score": score
-                    })
-                    break  # Only count each feature once
-        
+        positions = _KEYWORD_AUTOMATON.first_positions(message_lower)
+        matched = positions.keys()
+        if not matched:
+            return features
+
+        # Determine sentiment once; it applies to every mentioned feature
+        has_positive = any(kind == "positive" for kind, _ in matched)
+        has_negative = any(kind == "negative" for kind, _ in matched)
+
+        if has_positive and not has_negative:
+            sentiment = "positive"
+            score = 0.7
+        elif has_negative and not has_positive:
+            sentiment = "negative"
+            score = -0.7
+        else:
+            sentiment = "positive"
+            score = 0.5  # Neutral default
+
+        # Only count each feature once, for its first listed keyword
+        feature_keywords: Dict[str, str] = {}
+        for hit in matched:
+            rank = _FEATURE_KEYWORD_RANK.get(hit)
+            if rank is None:
+                continue
+            feature, keyword = hit
+            current = feature_keywords.get(feature)
+            if current is None or rank < _FEATURE_KEYWORD_RANK[(feature, current)]:
+                feature_keywords[feature] = keyword
+
+        # Sentences and their start offsets, so a keyword's first match offset
+        # maps to its sentence with a binary search
+        sentences = _SENTENCE_SPLIT_RE.split(user_message)
+        sentence_starts = [0] + [m.end() for m in _SENTENCE_SPLIT_RE.finditer(user_message)]
+        # Offsets only line up if lowercasing kept the length (true for nearly all text)
+        offsets_valid = len(message_lower) == len(user_message)
+
+        for feature in sorted(feature_keywords, key=_FEATURE_ORDER.__getitem__):
+            keyword = feature_keywords[feature]
+
+            # Extract sentence containing the keyword
+            if offsets_valid:
+                index = bisect_right(sentence_starts, positions[(feature, keyword)]) - 1
+                relevant_sentence = sentences[index].strip()
+            else:
+                relevant_sentence = next(
+                    (s for s in sentences if keyword in s.lower()),
+                    user_message
+                ).strip()
+
+            features.append({
+                "feature": feature,
+                "sentence": relevant_sentence,
+                "sentiment": sentiment,
+                "score": score
+            })
+
         return features
 
 
 # Singleton instance
 _sentiment_analyzer: Optional[SentimentAnalyzer] = None
+_sentiment_analyzer_lock = threading.Lock()
 
 
 def get_sentiment_analyzer(gemini_api_key: str) -> SentimentAnalyzer:
-    """Get or create the sentiment analyzer singleton."""
+    """Get or create the sentiment analyzer singleton.
+
+    Uses double-checked locking so concurrent first calls build the LangChain
+    client only once.
+    """
     global _sentiment_analyzer
-    
+
     if _sentiment_analyzer is None:
-        _sentiment_analyzer = SentimentAnalyzer(gemini_api_key)
-    
+        with _sentiment_analyzer_lock:
+            if _sentiment_analyzer is None:
+                _sentiment_analyzer = SentimentAnalyzer(gemini_api_key)
+
     return _sentiment_analyzer
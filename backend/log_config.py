@@ -0,0 +1,41 @@
+"""Non-blocking logging setup for the backend.
+
+Handlers only enqueue log records; a `QueueListener` thread formats them and
+does the actual stream I/O, so logging never blocks the event loop.
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)-8s %(name)s: %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def start_logging(level: int = logging.INFO) -> None:
+    """Route root logger records through a queue to a background listener."""
+    global _listener
+
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush pending records and stop the background listener."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,30 +1,43 @@
 """FastAPI backend for SeoulMinds night-action project."""
 
+import asyncio
+import logging
 import os
 from contextlib import asynccontextmanager
 
+import orjson
+from bson import ObjectId
+
 from db import seeder
-from db.connection import attach_db_to_app
+from db.connection import attach_db_to_app, make_motor_client, pool_stats
 from db.models import HealthResponse, MessageRequest
-from fastapi import FastAPI, HTTPException, status
+from log_config import start_logging, stop_logging
+from fastapi import FastAPI, Header, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from json_response import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from routers import products as products_router
 from routers import user_profile as user_profile_router
+from vector_db.embedding_cache import get_embedding_cache_stats
+
+logger = logging.getLogger(__name__)
 
 # Import Gemini service
 try:
     from llm_api.gemini_service import get_gemini_service
     from llm_api.product_context import (
+        QueryCtx,
         build_product_context_for_llm,
         format_products_for_response,
+        is_small_talk,
         search_products_by_query,
     )
-    from llm_api.sentiment_analyzer import get_sentiment_analyzer
+    from llm_api.sentiment_analyzer import get_sentiment_analyzer, should_analyze_sentiment
+    from vector_db.chat_cache import get_chat_cache_service, get_chat_cache_service_async
     GEMINI_AVAILABLE = True
 except ImportError as e:
-    print(f"Warning: Could not import Gemini service: {e}")
+    logger.warning("Could not import Gemini service: %s", e)
     GEMINI_AVAILABLE = False
 from routers import users as users_router
 
@@ -38,6 +51,17 @@ FRONTEND_URL = os.getenv("FRONTEND_URL", f"http://localhost:{FRONTEND_PORT}")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 BACKEND_PORT = int(os.getenv("BACKEND_PORT", "8001"))
+ENVIRONMENT = os.getenv("ENVIRONMENT") or os.getenv("PYTHON_ENV") or os.getenv("FASTAPI_ENV") or os.getenv("ENV") or "development"
+# Uvicorn worker processes when run as a script outside development
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "4"))
+# Comma-separated browser origins allowed to call the API (defaults to the frontend)
+CORS_ALLOW_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ALLOW_ORIGINS", FRONTEND_URL).split(",")
+    if origin.strip()
+]
+PROFILE_SYNC_BATCH_SIZE = 64  # user profiles per Qdrant upsert at startup
+CHAT_CACHE_EVICTION_INTERVAL_SECONDS = 600
 
 # Global database connection
 db_client: AsyncIOMotorClient | None = None
@@ -48,13 +72,76 @@ db: AsyncIOMotorDatabase | None = None
 # Lifecycle
 # ============================================================================
 
+async def _evict_chat_cache_periodically(chat_cache) -> None:
+    """Delete expired chat cache entries every CHAT_CACHE_EVICTION_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(CHAT_CACHE_EVICTION_INTERVAL_SECONDS)
+        await asyncio.to_thread(chat_cache.evict_expired)
+
+
+async def _run_startup_tasks(db: AsyncIOMotorDatabase) -> None:
+    """Build indexes, seed and sync profiles to Qdrant (once per deploy)."""
+    # The hot query paths rely on these indexes in every environment
+    try:
+        await seeder.backfill_product_search_fields(db)
+        index_results = await seeder.ensure_indexes(db)
+        for coll_name, result in index_results.items():
+            if isinstance(result, Exception):
+                logger.warning("⚠️ Failed to create %s indexes: %s", coll_name, result)
+    except Exception as e:
+        logger.warning("⚠️ Failed to prepare indexes: %s", e)
+    # Attempt automatic seeding in non-production environments
+    try:
+        force = os.getenv("FORCE_DB_SEED", "0") in ("1", "true", "True")
+        if ENVIRONMENT != "production" or force:
+            logger.info("🌱 Running DB auto-seed check...")
+            seed_summary = await seeder.seed_if_empty(db, force=force)
+            logger.info("✅ DB seeding result: %s", seed_summary)
+
+            # Sync user profiles from MongoDB to Qdrant
+            logger.info("🔄 Syncing user profiles to Qdrant...")
+            try:
+                from vector_db.qdrant_service import get_qdrant_service
+                qdrant = await get_qdrant_service()
+
+                # Stream user profiles from MongoDB (only the synced fields)
+                profiles_coll = db.get_collection("user_profiles")
+                cursor = profiles_coll.find(
+                    {},
+                    projection={"_id": 0, "user_id": 1, "feature_weights": 1, "evidence": 1},
+                )
+
+                # One Qdrant upsert per batch
+                total_count = 0
+                synced_count = 0
+                batch = []
+                async for profile in cursor:
+                    total_count += 1
+                    batch.append(profile)
+                    if len(batch) >= PROFILE_SYNC_BATCH_SIZE:
+                        synced_count += await qdrant.sync_many_from_mongodb_data(batch)
+                        batch = []
+                if batch:
+                    synced_count += await qdrant.sync_many_from_mongodb_data(batch)
+
+                logger.info("✅ Synced %d/%d user profiles to Qdrant", synced_count, total_count)
+            except Exception as sync_error:
+                logger.warning("⚠️ Failed to sync user profiles to Qdrant: %s", sync_error)
+        else:
+            logger.warning("⚠️ Skipping DB auto-seed in production")
+    except Exception as e:
+        logger.error("❌ DB seeding failed: %s", e)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Connect to MongoDB on startup, disconnect on shutdown."""
     global db_client, db
-    
+
+    start_logging()
+
     try:
-        db_client = AsyncIOMotorClient(MONGODB_URL)
+        db_client = make_motor_client(MONGODB_URL)
         db = db_client.seoulminds_db
         # attach to app.state in case routers need it
         try:
@@ -64,53 +151,56 @@ async def lifespan(app: FastAPI):
             pass
         # Verify connection
         await db.command("ping")
-        print("✅ Connected to MongoDB")
-        # Attempt automatic seeding in non-production environments
-        try:
-            force = os.getenv("FORCE_DB_SEED", "0") in ("1", "true", "True")
-            env = os.getenv("ENVIRONMENT") or os.getenv("PYTHON_ENV") or os.getenv("FASTAPI_ENV") or os.getenv("ENV") or "development"
-            if env != "production" or force:
-                print("🌱 Running DB auto-seed check...")
-                seed_summary = await seeder.seed_if_empty(db, force=force)
-                print(f"✅ DB seeding result: {seed_summary}")
-                
-                # Sync user profiles from MongoDB to Qdrant
-                print("🔄 Syncing user profiles to Qdrant...")
-                try:
-                    from vector_db.qdrant_service import get_qdrant_service
-                    qdrant = get_qdrant_service()
-                    
-                    # Get all user profiles from MongoDB
-                    profiles_coll = db.get_collection("user_profiles")
-                    profiles = await profiles_coll.find({}).to_list(None)
-                    
-                    synced_count = 0
-                    for profile in profiles:
-                        user_id = profile.get("user_id")
-                        if user_id:
-                            profile_copy = dict(profile)
-                            profile_copy.pop("_id", None)
-                            success = qdrant.sync_from_mongodb_data(user_id, profile_copy)
-                            if success:
-                                synced_count += 1
-                    
-                    print(f"✅ Synced {synced_count}/{len(profiles)} user profiles to Qdrant")
-                except Exception as sync_error:
-                    print(f"⚠️ Failed to sync user profiles to Qdrant: {sync_error}")
-            else:
-                print("⚠️ Skipping DB auto-seed in production")
-        except Exception as e:
-            print(f"❌ DB seeding failed: {e}")
+        logger.info("✅ Connected to MongoDB")
+        # Every worker runs this lifespan; the one-time setup runs in one
+        if await seeder.claim_startup_task(db, "startup"):
+            await _run_startup_tasks(db)
+        else:
+            logger.info("⏭️ Startup tasks already claimed by another worker")
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
+        logger.error("❌ MongoDB connection failed: %s", e)
         raise
 
+    # Warm the Gemini clients so the first chat request doesn't pay their init cost
+    if GEMINI_AVAILABLE and GEMINI_API_KEY:
+        try:
+            app.state.gemini_service = get_gemini_service(api_key=GEMINI_API_KEY)
+            if app.state.gemini_service:
+                logger.info("✅ Gemini service initialized")
+        except Exception as e:
+            logger.warning("⚠️ Failed to warm up Gemini service: %s", e)
+        try:
+            app.state.sentiment_analyzer = get_sentiment_analyzer(GEMINI_API_KEY)
+            logger.info("✅ Sentiment analyzer initialized")
+        except Exception as e:
+            logger.warning("⚠️ Failed to warm up sentiment analyzer: %s", e)
+
+    # Periodically drop expired semantic chat cache entries
+    cache_eviction_task = None
+    if GEMINI_AVAILABLE and GEMINI_API_KEY:
+        try:
+            chat_cache = await get_chat_cache_service_async(GEMINI_API_KEY)
+            if chat_cache:
+                cache_eviction_task = asyncio.create_task(_evict_chat_cache_periodically(chat_cache))
+                logger.info("✅ Chat cache initialized")
+        except Exception as e:
+            logger.warning("⚠️ Failed to initialize chat cache: %s", e)
+
     yield
 
     # Cleanup
+    if cache_eviction_task:
+        cache_eviction_task.cancel()
+    try:
+        from vector_db.qdrant_service import close_qdrant_service
+        await close_qdrant_service()
+    except Exception as e:
+        logger.warning("⚠️ Failed to flush queued Qdrant writes: %s", e)
     if db_client:
         db_client.close()
-        print("✅ Disconnected from MongoDB")
+        logger.info("✅ Disconnected from MongoDB")
+
+    stop_logging()
 
 
 # ============================================================================
@@ -118,19 +208,22 @@ async def lifespan(app: FastAPI):
 # ============================================================================
 
 app = FastAPI(
+    default_response_class=ORJSONResponse,
     title="SeoulMinds Night Action API",
     description="AI-driven backend for HackSeoul 2025",
     version="0.1.0",
     lifespan=lifespan,
 )
 
-# CORS Middleware - must be added first
+# CORS Middleware - must be added first. An explicit origin list lets
+# Starlette answer with a set lookup, and preflights are cached for a day
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for development
+    allow_origins=CORS_ALLOW_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type", "authorization"],
+    max_age=86400,
 )
 
 # include routers
@@ -153,15 +246,114 @@ async def health_check():
     return {
         "status": "healthy",
         "mongodb": mongodb_status,
+        "mongodb_pool": pool_stats.snapshot(),
+        "embedding_cache": get_embedding_cache_stats(),
     }
 
 
+async def _find_products_with_context(text: str) -> tuple[list, str | None]:
+    """
+    Search products for a chat message and build their Gemini context.
+
+    Greetings / small talk skip the search.
+
+    Returns:
+        Tuple of (raw product documents, product context or None)
+    """
+    query_ctx = QueryCtx.from_query(text)
+    if is_small_talk(query_ctx):
+        return [], None
+
+    products_raw = await search_products_by_query(
+        user_query=query_ctx,
+        db=db,
+        limit=5
+    )
+    return products_raw, await build_product_context_for_llm(products_raw)
+
+
+async def _lookup_cached_response(text: str) -> tuple[dict | None, list | None]:
+    """
+    Look up a cached answer to a semantically similar recent message.
+
+    Returns:
+        Tuple of (cached payload or None, query embedding or None); cache
+        errors count as a miss
+    """
+    try:
+        chat_cache = await get_chat_cache_service_async(GEMINI_API_KEY)
+        if chat_cache:
+            return await chat_cache.lookup(text)
+    except Exception as cache_error:
+        logger.warning("Chat cache error: %s", cache_error)
+    return None, None
+
+
+async def _analyze_sentiment_and_update_profile(
+    user_id: str,
+    text: str,
+    features: list | None = None,
+) -> list:
+    """
+    Record a message's feature sentiment in the user's preference profile.
+
+    Args:
+        user_id: Profile to update
+        text: The user's message
+        features: Sentiment features already extracted for the message; when
+            None the sentiment analyzer is run on `text`
+
+    Returns:
+        The sentiment features (empty if analysis failed)
+    """
+    sentiment_features = []
+    try:
+        if features is not None:
+            sentiment_features = features
+        else:
+            sentiment_analyzer = (
+                getattr(app.state, "sentiment_analyzer", None)
+                or get_sentiment_analyzer(GEMINI_API_KEY)
+            )
+            sentiment_features = await sentiment_analyzer.analyze_message(text)
+
+        # Update user profile with sentiment data: one Qdrant upsert for all
+        # features, then (only once it is stored) one MongoDB write
+        if sentiment_features:
+            from vector_db.qdrant_service import get_qdrant_service
+            qdrant = await get_qdrant_service()
+
+            profile = await qdrant.add_evidence_batch(user_id, sentiment_features)
+            if profile:
+                if logger.isEnabledFor(logging.INFO):
+                    updated = ", ".join(
+                        f"{f['feature']} -> {f['sentiment']} ({f['score']})" for f in sentiment_features
+                    )
+                    logger.info("✅ Updated %s profile: %s", user_id, updated)
+
+                # Also sync to MongoDB for persistence
+                profiles_coll = db.get_collection("user_profiles")
+                await profiles_coll.update_one(
+                    {"user_id": user_id},
+                    {"$set": profile},
+                    upsert=True
+                )
+    except Exception as sentiment_error:
+        logger.warning("Sentiment analysis error: %s", sentiment_error)
+        # Continue even if sentiment analysis fails
+
+    return sentiment_features
+
+
 @app.post("/api/chat")
-async def send_message(request: MessageRequest):
+async def send_message(request: MessageRequest, accept: str | None = Header(default=None)):
     """
     Send a message and get AI response with product recommendations.
     Uses Gemini AI for intelligent shopping assistance.
     Also analyzes user sentiment and updates their preference profile.
+
+    Clients sending `Accept: text/event-stream` get the response streamed as
+    Server-Sent Events (see `/api/chat/stream`); others get a single JSON body.
     """
     if db is None:
         raise HTTPException(
@@ -169,6 +361,9 @@ async def send_message(request: MessageRequest):
             detail="Database connection failed",
         )
 
+    if accept and "text/event-stream" in accept:
+        return await stream_message(request)
+
     try:
         ai_response = None
         model_used = "mock"
@@ -179,67 +374,78 @@ async def send_message(request: MessageRequest):
         # Try to use Gemini with product search if available
         if GEMINI_AVAILABLE and GEMINI_API_KEY:
             try:
-                # Step 1: Search for relevant products based on user query
-                products_raw = await search_products_by_query(
-                    user_query=request.text,
-                    db=db,
-                    limit=5
+                user_id = request.user_id or "demo-user"
+                # Only analyze if we have a valid user_id and the message can
+                # carry feature sentiment (greetings etc. skip the LLM)
+                analyze_sentiment = (
+                    bool(user_id)
+                    and user_id != "anonymous"
+                    and should_analyze_sentiment(request.text)
+                )
+                combined_features = None
+
+                # Step 0: Look for the answer to a semantically similar recent
+                # query while searching for relevant products based on the
+                # user query (steps 1-2) concurrently
+                (cached, query_vector), (products_raw, product_context) = await asyncio.gather(
+                    _lookup_cached_response(request.text),
+                    _find_products_with_context(request.text),
                 )
 
-                # Step 2: Build product context for Gemini
-                product_context = await build_product_context_for_llm(products_raw)
-
-                # Step 3: Get AI response with product context
-                gemini_service = get_gemini_service(api_key=GEMINI_API_KEY)
-                if gemini_service:
-                    ai_response = await gemini_service.generate_response(
-                        user_query=request.text,
-                        product_context=product_context
+                if cached:
+                    # Reuse the cached answer (skips Gemini)
+                    ai_response = cached["ai_response"]
+                    products = cached.get("products", [])
+                    model_used = cached.get("model", "gemini-2.5-flash")
+                else:
+                    # Step 3: Get AI response with product context. When the
+                    # user's profile gets updated, the same call also returns the
+                    # message's feature sentiment (saves a second Gemini request)
+                    gemini_service = (
+                        getattr(app.state, "gemini_service", None)
+                        or get_gemini_service(api_key=GEMINI_API_KEY)
                     )
-                    model_used = "gemini-2.5-flash"
-
-                # Step 4: Format products for response
-                products = format_products_for_response(products_raw)
+                    if gemini_service:
+                        if analyze_sentiment:
+                            ai_response, combined_features = await gemini_service.generate_response_with_sentiment(
+                                user_query=request.text,
+                                product_context=product_context
+                            )
+                        else:
+                            ai_response = await gemini_service.generate_response(
+                                user_query=request.text,
+                                product_context=product_context
+                            )
+                        model_used = "gemini-2.5-flash"
+
+                    # Step 4: Format products for response
+                    products = format_products_for_response(products_raw)
+
+                    # Cache real Gemini answers (not the canned fallback, nor
+                    # an answer whose JSON envelope failed to parse); an
+                    # embedding means the lookup already built the (enabled) cache
+                    if (
+                        query_vector
+                        and gemini_service
+                        and not (analyze_sentiment and combined_features is None)
+                        and not gemini_service.is_fallback_response(request.text, ai_response)
+                    ):
+                        chat_cache = get_chat_cache_service(GEMINI_API_KEY)
+                        await chat_cache.store(query_vector, {
+                            "ai_response": ai_response,
+                            "products": products,
+                            "search_query": search_query,
+                            "model": model_used,
+                        })
 
                 # Step 5: Analyze sentiment and update user profile
-                # Only analyze if we have a valid user_id
-                user_id = request.user_id or "demo-user"
-                if user_id and user_id != "anonymous":
-                    try:
-                        sentiment_analyzer = get_sentiment_analyzer(GEMINI_API_KEY)
-                        sentiment_features = await sentiment_analyzer.analyze_message(request.text)
-                        
-                        # Update user profile with sentiment data
-                        if sentiment_features:
-                            from vector_db.qdrant_service import get_qdrant_service
-                            qdrant = get_qdrant_service()
-                            
-                            for feature_data in sentiment_features:
-                                success = qdrant.add_evidence(
-                                    user_id=user_id,
-                                    feature=feature_data["feature"],
-                                    sentence=feature_data["sentence"],
-                                    sentiment=feature_data["sentiment"],
-                                    score=feature_data["score"]
-                                )
-                                if success:
-                                    print(f"✅ Updated {user_id} profile: {feature_data['feature']} -> {feature_data['sentiment']} ({feature_data['score']})")
-                            
-                            # Also sync to MongoDB for persistence
-                            profile = qdrant.get_user_profile(user_id)
-                            if profile:
-                                profiles_coll = db.get_collection("user_profiles")
-                                await profiles_coll.update_one(
-                                    {"user_id": user_id},
-                                    {"$set": profile},
-                                    upsert=True
-                                )
-                    except Exception as sentiment_error:
-                        print(f"Sentiment analysis error: {sentiment_error}")
-                        # Continue even if sentiment analysis fails
+                if analyze_sentiment:
+                    sentiment_features = await _analyze_sentiment_and_update_profile(
+                        user_id, request.text, combined_features
+                    )
 
             except Exception as gemini_error:
-                print(f"Gemini/Product search error: {gemini_error}")
+                logger.warning("Gemini/Product search error: %s", gemini_error)
                 # Fall back to mock response
 
         # Fallback to mock if Gemini not available or failed
@@ -276,8 +482,105 @@ async def send_message(request: MessageRequest):
         )
 
 
+def _sse_event(payload: dict) -> str:
+    """Encode a payload as a single Server-Sent Events message."""
+    return f"data: {orjson.dumps(payload, default=str).decode()}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def stream_message(request: MessageRequest):
+    """
+    Stream the AI response to a message as Server-Sent Events.
+
+    Emits a `products` event with the recommendations first, then one
+    `delta` event per response chunk. Once the reply is complete the message
+    is stored (and the user's profile updated, as in `/api/chat`) and a final
+    `done` event carries the stored message id and sentiment features.
+    """
+    if db is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database connection failed",
+        )
+
+    async def event_stream():
+        gemini_service = None
+        product_context = None
+        products = []
+        sentiment_features = []
+        model_used = "mock"
+        sentiment_task = None
+
+        if GEMINI_AVAILABLE and GEMINI_API_KEY:
+            # Sentiment analysis only needs the message, so it runs while the
+            # products are searched and the reply is streamed
+            user_id = request.user_id or "demo-user"
+            if user_id != "anonymous" and should_analyze_sentiment(request.text):
+                sentiment_task = asyncio.create_task(
+                    _analyze_sentiment_and_update_profile(user_id, request.text)
+                )
+            try:
+                products_raw, product_context = await _find_products_with_context(request.text)
+                if product_context is not None:  # not small talk
+                    products = format_products_for_response(products_raw)
+                    yield _sse_event({"products": products})
+                gemini_service = (
+                    getattr(app.state, "gemini_service", None)
+                    or get_gemini_service(api_key=GEMINI_API_KEY)
+                )
+            except Exception as gemini_error:
+                logger.warning("Gemini/Product search error: %s", gemini_error)
+
+        if gemini_service is None:
+            ai_response = f"Echo: {request.text}"
+            yield _sse_event({"delta": ai_response})
+        else:
+            model_used = "gemini-2.5-flash"
+            chunks = []
+            async for delta in gemini_service.stream_response(
+                user_query=request.text,
+                product_context=product_context
+            ):
+                chunks.append(delta)
+                yield _sse_event({"delta": delta})
+            ai_response = "".join(chunks)
+
+        if sentiment_task:
+            sentiment_features = await sentiment_task
+
+        # Store message in MongoDB
+        message_id = None
+        try:
+            result = await db.messages.insert_one({
+                "user_message": request.text,
+                "ai_response": ai_response,
+                "model": model_used,
+                "user_id": request.user_id or "anonymous",
+                "products": products,
+                "search_query": request.text,
+                "sentiment_features": sentiment_features,
+            })
+            message_id = str(result.inserted_id)
+        except Exception as e:
+            logger.error("Failed to store streamed message: %s", e)
+
+        yield _sse_event({
+            "done": True,
+            "id": message_id,
+            "model": model_used,
+            "sentiment_features": sentiment_features,
+        })
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+# Fields returned by GET /api/messages; skips the stored products and
+# sentiment features
+_MESSAGE_LIST_PROJECTION = {"user_message": 1, "ai_response": 1, "model": 1}
+
+
 @app.get("/api/messages")
-async def get_messages(user_id: str | None = None, limit: int = 50):
+async def get_messages(user_id: str | None = None, limit: int = Query(50, ge=1, le=500)):
     """Retrieve messages from database."""
     if db is None:
         raise HTTPException(
@@ -287,7 +590,13 @@ async def get_messages(user_id: str | None = None, limit: int = 50):
 
     try:
         query = {} if not user_id else {"user_id": user_id}
-        messages = await db.messages.find(query).sort("_id", -1).limit(limit).to_list(None)
+        cursor = (
+            db.messages.find(query, _MESSAGE_LIST_PROJECTION)
+            .sort("_id", -1)
+            .limit(limit)
+            .batch_size(limit)
+        )
+        messages = [msg async for msg in cursor]
         
         return {
             "messages": [
@@ -317,23 +626,22 @@ async def get_product(product_id: str):
 
     coll = db.get_collection("products")
     try:
-        # Try by _id first (as string) then by product_id
-        from bson import ObjectId
-
-        query = None
-        try:
+        # Look up by _id when the id is a valid ObjectId, else by product_id
+        if ObjectId.is_valid(product_id):
             query = {"_id": ObjectId(product_id)}
-        except Exception:
+        else:
             query = {"product_id": product_id}
 
-        doc = await coll.find_one(query)
-        if not doc:
+        docs = await coll.aggregate([
+            {"$match": query},
+            {"$limit": 1},
+            {"$addFields": {"id": {"$toString": "$_id"}}},
+            {"$project": {"_id": 0}},
+        ]).to_list(length=1)
+        if not docs:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Convert _id to string
-        doc["id"] = str(doc.get("_id"))
-        doc.pop("_id", None)
-        return doc
+        return docs[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -358,7 +666,7 @@ async def root():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"},
     )
@@ -367,9 +675,18 @@ async def global_exception_handler(request, exc):
 if __name__ == "__main__":
     import uvicorn
 
+    is_development = ENVIRONMENT == "development"
+    workers = 1 if is_development else WEB_CONCURRENCY
+    # Worker processes inherit this, so their services know how many run
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    # uvloop + httptools (bundled with uvicorn[standard]); the reloader only
+    # supports a single worker, so multiple processes are for non-dev runs
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=BACKEND_PORT,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        reload=is_development,
     )
@@ -5,13 +5,30 @@ access if it's empty. Supports simple pagination and optional text search.
 """
 from __future__ import annotations
 
+import re
 from typing import List, Optional
+
 from fastapi import APIRouter, Request, HTTPException, Query
-from fastapi.responses import JSONResponse
+
+from json_response import ORJSONResponse
 
 from db.models import Product, get_products_collection
 from db import seeder
 
+# Final pipeline stages: expose the ObjectId as a string `id` server-side so
+# documents come back in response shape
+_ID_TO_STRING_STAGES = [
+    {"$addFields": {"id": {"$toString": "$_id"}}},
+    {"$project": {"_id": 0}},
+]
+
+# Set once the collection is known to be non-empty, so listings skip the
+# lazy seeding check
+_seeded = False
+
+# Queries shorter than this use a title substring match instead of $text
+_MIN_TEXT_SEARCH_LENGTH = 3
+
 router = APIRouter(prefix="/api/products", tags=["products"])
 
 
@@ -19,9 +36,13 @@ router = APIRouter(prefix="/api/products", tags=["products"])
 async def list_products(request: Request, q: Optional[str] = Query(None), page: int = 1, limit: int = 20):
     """List products. If products collection is empty, run seeding first.
 
-    - q: optional text query (search in title)
+    The returned `count` is the number of matching products (the whole
+    collection when no query is given).
+
+    - q: optional text query (word search in title, description, category
+      and tags; queries under 3 characters match title substrings)
     - page: 1-based page number
-    - limit: items per page
+    - limit: items per page (0 for all items)
     """
     db = getattr(request.app.state, "db", None)
     if db is None:
@@ -29,35 +50,47 @@ async def list_products(request: Request, q: Optional[str] = Query(None), page:
 
     coll = get_products_collection(db)
 
-    # Check if empty and seed lazily
-    count = await coll.count_documents({})
-    if count == 0:
-        try:
-            summary = await seeder.seed_if_empty(db)
-            # Recount after seeding
-            count = await coll.count_documents({})
-        except Exception as e:
-            return JSONResponse(status_code=500, content={"detail": f"Seeding failed: {e}"})
+    # Check if empty and seed lazily (once per process)
+    global _seeded
+    if not _seeded:
+        seeded = True
+        if await coll.estimated_document_count() == 0:
+            try:
+                summary = await seeder.seed_if_empty(db)
+            except Exception as e:
+                return ORJSONResponse(status_code=500, content={"detail": f"Seeding failed: {e}"})
+            # A failed seed is retried by the next listing
+            seeded = summary["products"].get("status") != "error"
+        _seeded = seeded
 
     query = {}
-    if q:
-        # simple text search on title
-        query = {"title": {"$regex": q, "$options": "i"}}
+    sort = {"_id": -1}
+    if q and len(q) >= _MIN_TEXT_SEARCH_LENGTH:
+        # Word search through the products text index, best matches first
+        query = {"$text": {"$search": q}}
+        sort = {"score": {"$meta": "textScore"}, "_id": -1}
+    elif q:
+        # Too short for word search: substring match on title
+        query = {"title": {"$regex": re.escape(q), "$options": "i"}}
 
     skip = max(0, (page - 1)) * max(1, limit)
-    cursor = coll.find(query).sort("_id", -1).skip(skip).limit(limit)
-    docs = await cursor.to_list(length=limit)
-
-    items = []
-    for doc in docs:
-        # convert ObjectId to str for JSON serialization and avoid Pydantic parsing issues
-        item = dict(doc)
-        if "_id" in item:
-            try:
-                item["id"] = str(item["_id"])
-            except Exception:
-                item["id"] = item["_id"]
-            item.pop("_id", None)
-        items.append(item)
+    pipeline = [
+        {"$match": query},
+        {"$sort": sort},
+        {"$skip": skip},
+        # As with find().limit(): 0 means no limit and a negative limit
+        # counts as its absolute value ($limit must be positive)
+        *([{"$limit": abs(limit)}] if limit else []),
+        *_ID_TO_STRING_STAGES,
+    ]
+    items = await coll.aggregate(pipeline).to_list(length=None)
+
+    # Collection metadata for the unfiltered total; only filtered listings
+    # need an actual count
+    if query:
+        count = await coll.count_documents(query)
+    else:
+        count = await coll.estimated_document_count()
 
-    return {"items": items, "count": count, "page": page, "limit": limit}
+    # Return the response directly, skipping FastAPI's jsonable_encoder pass
+    return ORJSONResponse({"items": items, "count": count, "page": page, "limit": limit})
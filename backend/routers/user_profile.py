@@ -5,7 +5,7 @@ from db.connection import get_db
 from fastapi import APIRouter, Depends, HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel
-from vector_db.qdrant_service import get_qdrant_service
+from vector_db.qdrant_service import FEATURE_DIMENSIONS, get_qdrant_service
 
 router = APIRouter(prefix="/api/user-profile", tags=["user-profile"])
 
@@ -48,8 +48,8 @@ async def get_user_profile(user_id: str, db: AsyncIOMotorDatabase = Depends(get_
         mongodb_profile.pop("_id", None)
         
         # Sync to Qdrant for vector similarity search
-        qdrant = get_qdrant_service()
-        qdrant.sync_from_mongodb_data(user_id, mongodb_profile)
+        qdrant = await get_qdrant_service()
+        await qdrant.sync_from_mongodb_data(user_id, mongodb_profile)
         
         return mongodb_profile
     except HTTPException:
@@ -72,21 +72,21 @@ async def add_evidence(data: EvidenceData):
     }
     """
     try:
-        qdrant = get_qdrant_service()
+        if data.feature not in FEATURE_DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"Invalid feature: {data.feature}")
         
-        success = qdrant.add_evidence(
-            user_id=data.user_id,
-            feature=data.feature,
-            sentence=data.sentence,
-            sentiment=data.sentiment,
-            score=data.score
-        )
+        qdrant = await get_qdrant_service()
         
-        if not success:
-            raise HTTPException(status_code=400, detail=f"Invalid feature: {data.feature}")
+        # Returns the updated profile, saving a separate fetch
+        profile = await qdrant.add_evidence_batch(data.user_id, [{
+            "feature": data.feature,
+            "sentence": data.sentence,
+            "sentiment": data.sentiment,
+            "score": data.score,
+        }])
         
-        # Return updated profile
-        profile = qdrant.get_user_profile(data.user_id)
+        if not profile:
+            raise HTTPException(status_code=500, detail="Failed to add evidence")
         
         return {
             "success": True,
@@ -112,9 +112,9 @@ async def update_weights(data: WeightUpdate):
     }
     """
     try:
-        qdrant = get_qdrant_service()
+        qdrant = await get_qdrant_service()
         
-        success = qdrant.update_feature_weights(
+        success = await qdrant.update_feature_weights(
             user_id=data.user_id,
             weights=data.weights
         )
@@ -123,7 +123,7 @@ async def update_weights(data: WeightUpdate):
             raise HTTPException(status_code=400, detail="Failed to update weights")
         
         # Return updated profile
-        profile = qdrant.get_user_profile(data.user_id)
+        profile = await qdrant.get_user_profile(data.user_id)
         
         return {
             "success": True,
@@ -143,8 +143,8 @@ async def get_similar_users(user_id: str, limit: int = 5):
     Returns similarity scores between 0.0 and 1.0 (max).
     """
     try:
-        qdrant = get_qdrant_service()
-        similar_users = qdrant.get_similar_users(user_id, limit)
+        qdrant = await get_qdrant_service()
+        similar_users = await qdrant.get_similar_users(user_id, limit)
         
         return {
             "user_id": user_id,
@@ -158,7 +158,7 @@ async def get_similar_users(user_id: str, limit: int = 5):
 @router.get("/dimensions")
 async def get_feature_dimensions():
     """Get all available feature dimensions."""
-    qdrant = get_qdrant_service()
+    qdrant = await get_qdrant_service()
     dimensions = qdrant.get_feature_dimensions()
     
     return {
@@ -57,24 +57,26 @@ async def test_sentiment_analysis():
         print("Testing Sentiment Extraction")
         print("=" * 60)
         
-        for i, message in enumerate(test_messages, 1):
+        # Analyze all messages concurrently, then print in order
+        results = await asyncio.gather(
+            *(analyzer.analyze_message(message) for message in test_messages),
+            return_exceptions=True,
+        )
+        
+        for i, (message, features) in enumerate(zip(test_messages, results), 1):
             print(f"\n[Test {i}] Message: '{message}'")
             print("-" * 60)
             
-            try:
-                features = await analyzer.analyze_message(message)
-                
-                if features:
-                    print(f"✅ Extracted {len(features)} feature(s):")
-                    for feature in features:
-                        print(f"   • {feature['feature']}: {feature['sentiment']} "
-                              f"(score: {feature['score']:.2f})")
-                        print(f"     Sentence: \"{feature['sentence']}\"")
-                else:
-                    print("ℹ️  No product features detected (generic message)")
-                    
-            except Exception as e:
-                print(f"❌ Error analyzing message: {e}")
+            if isinstance(features, Exception):
+                print(f"❌ Error analyzing message: {features}")
+            elif features:
+                print(f"✅ Extracted {len(features)} feature(s):")
+                for feature in features:
+                    print(f"   • {feature['feature']}: {feature['sentiment']} "
+                          f"(score: {feature['score']:.2f})")
+                    print(f"     Sentence: \"{feature['sentence']}\"")
+            else:
+                print("ℹ️  No product features detected (generic message)")
         
         print("\n" + "=" * 60)
         print("✅ All sentiment analysis tests completed!")
@@ -97,10 +99,10 @@ async def test_profile_update():
     print("=" * 60)
     
     try:
-        from vector_db.qdrant_service import get_qdrant_service
+        from vector_db.qdrant_service import close_qdrant_service, get_qdrant_service
         
         # Initialize service
-        qdrant = get_qdrant_service()
+        qdrant = await get_qdrant_service()
         print("✅ Qdrant service initialized")
         
         # Test user
@@ -108,37 +110,34 @@ async def test_profile_update():
         
         # Get initial profile
         print(f"\n[1] Getting initial profile for: {test_user}")
-        profile = qdrant.get_user_profile(test_user)
+        profile = await qdrant.get_user_profile(test_user)
         print(f"   Initial weights: {json.dumps(profile['feature_weights'], indent=2)}")
         
-        # Add positive evidence
+        # Add positive and negative evidence (independent, so run together)
         print(f"\n[2] Adding positive evidence (size: 'Perfect fit!')")
-        success = qdrant.add_evidence(
-            user_id=test_user,
-            feature="size",
-            sentence="Perfect fit!",
-            sentiment="positive",
-            score=0.9
+        print(f"[3] Adding negative evidence (price: 'Too expensive')")
+        size_added, price_added = await asyncio.gather(
+            qdrant.add_evidence(
+                user_id=test_user,
+                feature="size",
+                sentence="Perfect fit!",
+                sentiment="positive",
+                score=0.9
+            ),
+            qdrant.add_evidence(
+                user_id=test_user,
+                feature="price",
+                sentence="Too expensive",
+                sentiment="negative",
+                score=-0.7
+            ),
         )
-        print(f"   {'✅' if success else '❌'} Evidence added: {success}")
+        print(f"   {'✅' if size_added else '❌'} Size evidence added: {size_added}")
+        print(f"   {'✅' if price_added else '❌'} Price evidence added: {price_added}")
         
         # Get updated profile
-        profile = qdrant.get_user_profile(test_user)
+        profile = await qdrant.get_user_profile(test_user)
         print(f"   Updated size weight: {profile['feature_weights']['size']:.3f}")
-        
-        # Add negative evidence
-        print(f"\n[3] Adding negative evidence (price: 'Too expensive')")
-        success = qdrant.add_evidence(
-            user_id=test_user,
-            feature="price",
-            sentence="Too expensive",
-            sentiment="negative",
-            score=-0.7
-        )
-        print(f"   {'✅' if success else '❌'} Evidence added: {success}")
-        
-        # Get updated profile
-        profile = qdrant.get_user_profile(test_user)
         print(f"   Updated price weight: {profile['feature_weights']['price']:.3f}")
         
         # Show evidence
@@ -150,7 +149,7 @@ async def test_profile_update():
         
         # Find similar users
         print(f"\n[5] Finding similar users...")
-        similar = qdrant.get_similar_users(test_user, limit=3)
+        similar = await qdrant.get_similar_users(test_user, limit=3)
         if similar:
             print(f"   Found {len(similar)} similar user(s):")
             for user in similar:
@@ -158,6 +157,9 @@ async def test_profile_update():
         else:
             print("   No similar users found (database may be empty)")
         
+        # Persist queued profile writes before the event loop exits
+        await close_qdrant_service()
+        
         print("\n" + "=" * 60)
         print("✅ All profile update tests completed!")
         print("=" * 60)
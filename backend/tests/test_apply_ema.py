@@ -0,0 +1,57 @@
+"""Tests for the vectorized EMA kernel of the profile weights."""
+import random
+import unittest
+
+import numpy as np
+
+from vector_db.qdrant_service import EVIDENCE_LEARNING_RATE, VECTOR_SIZE, _apply_ema
+
+
+def _sequential_ema(vector, indices, scores):
+    """Reference: one clamped EMA step per update, in order."""
+    weights = [min(1.0, max(0.0, float(w))) if i in indices else float(w)
+               for i, w in enumerate(vector)]
+    for idx, score in zip(indices, scores):
+        target = (min(1.0, max(-1.0, score)) + 1.0) / 2.0
+        new_weight = weights[idx] * (1 - EVIDENCE_LEARNING_RATE) + target * EVIDENCE_LEARNING_RATE
+        weights[idx] = min(1.0, max(0.0, new_weight))
+    return np.array(weights)
+
+
+class ApplyEmaTest(unittest.TestCase):
+    def assert_matches_sequential(self, vector, indices, scores):
+        expected = _sequential_ema(vector, indices, scores)
+        actual = np.array(vector, dtype=np.float32)
+        _apply_ema(actual, indices, scores)
+        np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+    def test_distinct_features(self):
+        self.assert_matches_sequential([0.5] * VECTOR_SIZE, [0, 3, 6], [0.9, -0.7, 0.0])
+
+    def test_repeated_feature_compounds(self):
+        self.assert_matches_sequential([0.5] * VECTOR_SIZE, [2, 2, 2], [1.0, -1.0, 0.5])
+
+    def test_out_of_range_scores_are_clipped(self):
+        vector = [0.5] * VECTOR_SIZE
+        # Distinct-feature and repeated-feature paths
+        self.assert_matches_sequential(vector, [1], [5.0])
+        self.assert_matches_sequential(vector, [1, 1], [-4.0, 3.0])
+        self.assert_matches_sequential(vector, [4, 4, 5], [-1.5, -1.5, 2.0])
+
+    def test_out_of_range_weights_are_clamped(self):
+        vector = [1.4, -0.3] + [0.5] * (VECTOR_SIZE - 2)
+        self.assert_matches_sequential(vector, [0, 1], [0.2, 0.2])
+        self.assert_matches_sequential(vector, [0, 0, 1, 1], [0.2, -0.2, 0.9, 0.9])
+
+    def test_random_batches_match_sequential(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            vector = [rng.uniform(-0.5, 1.5) for _ in range(VECTOR_SIZE)]
+            count = rng.randint(1, 10)
+            indices = [rng.randrange(VECTOR_SIZE) for _ in range(count)]
+            scores = [rng.uniform(-3.0, 3.0) for _ in range(count)]
+            self.assert_matches_sequential(vector, indices, scores)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Tests for the chat cache singleton accessors."""
+import threading
+import unittest
+from unittest import mock
+
+from vector_db import chat_cache
+
+
+class GetChatCacheServiceAsyncTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(chat_cache, "_chat_cache_service", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_service_is_built_off_the_event_loop(self):
+        built_in = []
+
+        def build(gemini_api_key):
+            built_in.append(threading.get_ident())
+            return mock.Mock()
+
+        with mock.patch.object(chat_cache, "CHAT_CACHE_ENABLED", True), \
+                mock.patch.object(chat_cache, "ChatCacheService", side_effect=build):
+            service = await chat_cache.get_chat_cache_service_async("key")
+            self.assertIs(await chat_cache.get_chat_cache_service_async("key"), service)
+
+        self.assertEqual(len(built_in), 1)
+        self.assertNotEqual(built_in[0], threading.get_ident())
+
+    async def test_disabled_cache(self):
+        with mock.patch.object(chat_cache, "CHAT_CACHE_ENABLED", False):
+            self.assertIsNone(await chat_cache.get_chat_cache_service_async("key"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for the Gemini service's response handling (no Gemini calls)."""
+import unittest
+from unittest import mock
+
+import orjson
+
+from llm_api.gemini_service import GeminiService
+
+_FEATURE = {"feature": "color", "sentence": "I love the color", "sentiment": "positive", "score": 0.8}
+
+
+def _service() -> GeminiService:
+    # Skip __init__: neither an API key nor a model is needed here
+    return GeminiService.__new__(GeminiService)
+
+
+class FallbackResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.service = _service()
+        self.general = self.service._get_fallback_response("hello")
+
+    def test_stock_queries(self):
+        for query in ("Is this in stock?", "Can I BUY it now", "Which sizes are available?"):
+            with self.subTest(query=query):
+                response = self.service._get_fallback_response(query)
+                self.assertIn("inventory", response)
+                self.assertTrue(self.service.is_fallback_response(query, response))
+
+    def test_stock_words_match_whole_words(self):
+        self.assertEqual(self.service._get_fallback_response("any budget options?"), self.general)
+
+
+class GenerateResponseWithSentimentTest(unittest.IsolatedAsyncioTestCase):
+    QUERY = "Do you have red bags?"
+
+    def setUp(self):
+        self.service = _service()
+        self.service._sentiment_system_msg = None
+        self.service._build_messages = mock.Mock(return_value=[])
+        self.fallback = self.service._get_fallback_response(self.QUERY)
+
+    async def respond(self, content):
+        self.service._generate = mock.AsyncMock(return_value=content)
+        return await self.service.generate_response_with_sentiment(self.QUERY)
+
+    async def test_valid_envelope(self):
+        envelope = {"reply": " Here are some bags. ", "sentiment": {"features": [_FEATURE, {"feature": "size"}]}}
+        reply, features = await self.respond(orjson.dumps(envelope).decode())
+        self.assertEqual(reply, "Here are some bags.")
+        self.assertEqual(features, [_FEATURE])
+
+    async def test_fenced_envelope(self):
+        content = '```json\n{"reply": "Hi!", "sentiment": {"features": []}}\n```'
+        self.assertEqual(await self.respond(content), ("Hi!", []))
+
+    async def test_missing_sentiment_keeps_reply(self):
+        with self.assertLogs("llm_api.gemini_service", "WARNING"):
+            self.assertEqual(await self.respond('{"reply": "Hi!"}'), ("Hi!", None))
+
+    async def test_broken_envelope_is_not_shown(self):
+        for content in ('{"reply": "Hi!", "sentiment": ', '```json\n{"reply": "Hi"\n```', 'x "reply": "Hi"'):
+            with self.subTest(content=content), self.assertLogs("llm_api.gemini_service", "WARNING"):
+                self.assertEqual(await self.respond(content), (self.fallback, None))
+
+    async def test_plain_prose_is_kept(self):
+        with self.assertLogs("llm_api.gemini_service", "WARNING"):
+            self.assertEqual(await self.respond("  We have red bags!  "), ("We have red bags!", None))
+
+    async def test_empty_reply_falls_back(self):
+        self.assertEqual(await self.respond('{"reply": "  "}'), (self.fallback, None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""Tests for the Aho-Corasick keyword matcher."""
+import unittest
+
+from llm_api.keyword_automaton import KeywordAutomaton
+
+_ENTRIES = {
+    "color": ["color", "색"],
+    "positive": ["love", "good"],
+    "negative": ["not good"],
+}
+
+
+class KeywordAutomatonTest(unittest.TestCase):
+    def setUp(self):
+        self.automaton = KeywordAutomaton(_ENTRIES)
+
+    def test_matches_like_substring_search(self):
+        text = "i love the colors, but the fit is not good"
+        expected = {
+            (kind, kw) for kind, keywords in _ENTRIES.items() for kw in keywords if kw in text
+        }
+        self.assertEqual(self.automaton.matched_values(text), expected)
+
+    def test_keyword_shared_by_several_kinds(self):
+        automaton = KeywordAutomaton({"brand": ["nike"], "shoes": ["nike"]})
+        self.assertEqual(
+            automaton.matched_values("new nike shoes"),
+            {("brand", "nike"), ("shoes", "nike")},
+        )
+
+    def test_no_match(self):
+        self.assertEqual(self.automaton.matched_values("shipping was fast"), set())
+
+    def test_first_positions(self):
+        text = "색상이 좋아요, good good color"
+        positions = self.automaton.first_positions(text)
+        self.assertEqual(positions, {
+            ("color", "색"): text.index("색"),
+            ("positive", "good"): text.index("good"),
+            ("color", "color"): text.index("color"),
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
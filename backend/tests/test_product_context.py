@@ -0,0 +1,76 @@
+"""Tests for the query analysis helpers of the product context."""
+import unittest
+
+from llm_api.product_context import (
+    QueryCtx,
+    SearchCriteria,
+    extract_search_criteria,
+    is_small_talk,
+)
+
+
+class QueryCtxTest(unittest.TestCase):
+    def test_normalizes_query(self):
+        ctx = QueryCtx.from_query("  Nike Running SHOES  ")
+        self.assertEqual(ctx.lower, "nike running shoes")
+        self.assertEqual(ctx.tokens, ("nike", "running", "shoes"))
+        self.assertEqual(
+            ctx.keyword_hits,
+            {("brand", "nike"), ("category", "running"), ("category", "shoe")},
+        )
+
+    def test_equality_ignores_raw_text(self):
+        self.assertEqual(QueryCtx.from_query("Bags"), QueryCtx.from_query(" bags "))
+        self.assertEqual(hash(QueryCtx.from_query("Bags")), hash(QueryCtx.from_query("bags")))
+
+    def test_category_keywords_are_whole_words(self):
+        ctx = QueryCtx.from_query("watching a movie")
+        self.assertNotIn(("category", "watch"), ctx.keyword_hits)
+
+
+class ExtractSearchCriteriaTest(unittest.TestCase):
+    def test_category_brand_and_price(self):
+        self.assertEqual(
+            extract_search_criteria("Nike sneakers under 100000"),
+            SearchCriteria(("sneaker",), 100000, None, "shoes", "nike"),
+        )
+
+    def test_price_range(self):
+        criteria = extract_search_criteria("backpack over 20000 and less than 50000")
+        self.assertEqual((criteria.min_price, criteria.max_price), (20000, 50000))
+        self.assertEqual(criteria.category, "bags")
+
+    def test_general_keywords_without_category(self):
+        criteria = extract_search_criteria("show me a warm winter jacket")
+        self.assertEqual(criteria.keywords, ("warm", "winter", "jacket"))
+        self.assertIsNone(criteria.category)
+
+    def test_korean_brand_with_particle(self):
+        self.assertEqual(extract_search_criteria("아디다스를 찾아요").brand, "아디다스")
+
+    def test_accepts_query_ctx(self):
+        ctx = QueryCtx.from_query("Phone below 300")
+        self.assertEqual(extract_search_criteria(ctx), extract_search_criteria("phone below 300"))
+
+
+class IsSmallTalkTest(unittest.TestCase):
+    def test_greetings(self):
+        for text in ("hi", "Hello!", "thanks", "thank you!!", "Good morning", "안녕하세요"):
+            with self.subTest(text=text):
+                self.assertTrue(is_small_talk(text))
+
+    def test_short_message_without_intent(self):
+        self.assertTrue(is_small_talk("ok"))
+        self.assertTrue(is_small_talk("help me"))
+
+    def test_short_message_with_intent(self):
+        for text in ("bags", "nike", "under 50", "jacket"):
+            with self.subTest(text=text):
+                self.assertFalse(is_small_talk(text))
+
+    def test_long_message(self):
+        self.assertFalse(is_small_talk("what do you think about it"))
+
+
+if __name__ == "__main__":
+    unittest.main()
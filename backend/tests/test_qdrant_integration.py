@@ -0,0 +1,59 @@
+"""Integration tests of QdrantService against a Qdrant server, with the pinned client.
+
+Skipped unless QDRANT_INTEGRATION_TESTS=1. QDRANT_HOST / QDRANT_PORT /
+QDRANT_GRPC_PORT must point at a disposable server (e.g. the compose `qdrant`
+service): the tests write to its user_profiles and user_evidence collections.
+"""
+import os
+import unittest
+import uuid
+
+from vector_db.qdrant_service import (
+    EVIDENCE_COLLECTION_NAME,
+    VECTOR_SIZE,
+    QdrantService,
+    _user_id_to_uuid,
+)
+
+
+@unittest.skipUnless(os.getenv("QDRANT_INTEGRATION_TESTS") == "1", "needs a Qdrant server")
+class QdrantServiceIntegrationTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = QdrantService()
+        self.addAsyncCleanup(self.service.close)
+        await self.service._initialize_collection()
+        self.user_id = f"integration-{uuid.uuid4()}"
+        self.point_id = _user_id_to_uuid(self.user_id)
+        self.addAsyncCleanup(self.delete_points)
+
+    async def delete_points(self):
+        for collection_name in (self.service.collection_name, EVIDENCE_COLLECTION_NAME):
+            await self.service.client.delete(collection_name=collection_name, points_selector=[self.point_id])
+
+    async def test_evidence_is_stored_in_the_vectorless_collection(self):
+        profile = await self.service.add_evidence_batch(self.user_id, [
+            {"feature": "color", "sentence": "Love the color", "sentiment": "positive", "score": 0.9},
+        ])
+        self.assertIsNotNone(profile)
+
+        client = self.service.client
+        evidence_points = await client.retrieve(
+            collection_name=EVIDENCE_COLLECTION_NAME, ids=[self.point_id],
+        )
+        self.assertEqual(evidence_points[0].payload["evidence"], profile["evidence"])
+        profile_points = await client.retrieve(
+            collection_name=self.service.collection_name, ids=[self.point_id], with_vectors=True,
+        )
+        self.assertEqual(len(profile_points[0].vector), VECTOR_SIZE)
+
+        # Read back from Qdrant rather than the service's cache
+        self.service.invalidate(self.user_id)
+        stored = await self.service.get_user_profile(self.user_id)
+        self.assertEqual(stored["evidence"], profile["evidence"])
+        self.assertAlmostEqual(
+            stored["feature_weights"]["color"], profile["feature_weights"]["color"], places=5,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for QdrantService profile writes, against an in-memory fake client."""
+import asyncio
+import unittest
+from unittest import mock
+
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from vector_db import qdrant_service
+from vector_db.qdrant_service import EVIDENCE_COLLECTION_NAME, QdrantService
+
+_COLOR_FEATURE = {"feature": "color", "sentence": "Love the color", "sentiment": "positive", "score": 0.9}
+
+
+class _FakeQdrant:
+    """Records upserts; `fail` maps a collection to how many upserts to fail."""
+
+    def __init__(self, *args, **kwargs):
+        self.upserts = []
+        self.fail = {}
+        self.recommend = mock.AsyncMock(return_value=[])
+
+    async def upsert(self, collection_name, points):
+        await asyncio.sleep(0)
+        if self.fail.get(collection_name):
+            self.fail[collection_name] -= 1
+            raise ConnectionError("qdrant down")
+        self.upserts.append(collection_name)
+
+    async def retrieve(self, collection_name, ids, **kwargs):
+        return []
+
+
+class QdrantServiceWriteTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with mock.patch.object(qdrant_service, "AsyncQdrantClient", _FakeQdrant):
+            self.service = QdrantService()
+        self.client = self.service.client
+        self.addAsyncCleanup(self.service.close)
+
+    async def test_cancelled_writer_does_not_cancel_others(self):
+        state = await self.service._load_state("u1")
+        point_id = qdrant_service._user_id_to_uuid("u1")
+        first = asyncio.ensure_future(self.service._write_state(point_id, state))
+        second = asyncio.ensure_future(self.service._write_state(point_id, state))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        await asyncio.wait_for(second, timeout=1.0)
+        self.assertTrue(first.cancelled())
+        self.assertCountEqual(self.client.upserts, ["user_profiles", EVIDENCE_COLLECTION_NAME])
+
+    async def test_malformed_feature_leaves_profile_unchanged(self):
+        before = await self.service.get_user_profile("u1")
+        features = [
+            _COLOR_FEATURE,
+            {"feature": "size", "sentence": "Too small", "sentiment": "negative"},
+        ]
+
+        with self.assertLogs("vector_db.qdrant_service", "ERROR"):
+            self.assertIsNone(await self.service.add_evidence_batch("u1", features))
+        self.assertEqual(await self.service.get_user_profile("u1"), before)
+        self.assertEqual(self.client.upserts, [])
+
+    async def test_add_evidence_batch_skips_unknown_features(self):
+        profile = await self.service.add_evidence_batch("u1", [
+            {"feature": "color", "sentence": "Love the color", "sentiment": "positive", "score": 1.0},
+            {"feature": "smell", "sentence": "Smells nice", "sentiment": "positive", "score": 1.0},
+        ])
+
+        self.assertEqual([e["feature"] for e in profile["evidence"]], ["color"])
+        self.assertGreater(profile["feature_weights"]["color"], 0.5)
+        self.assertCountEqual(self.client.upserts, ["user_profiles", EVIDENCE_COLLECTION_NAME])
+
+
+    async def test_write_failing_in_one_collection_is_retried(self):
+        self.client.fail[EVIDENCE_COLLECTION_NAME] = 1
+
+        with self.assertLogs("vector_db", "WARNING") as logs:
+            profile = await self.service.add_evidence_batch("u1", [_COLOR_FEATURE])
+        self.assertIsNotNone(profile)
+        self.assertTrue(any("Retrying the user_evidence write" in line for line in logs.output))
+        self.assertCountEqual(self.client.upserts, ["user_profiles", EVIDENCE_COLLECTION_NAME])
+
+    async def test_write_failing_twice_in_one_collection_is_reported(self):
+        self.client.fail[EVIDENCE_COLLECTION_NAME] = 2
+
+        with self.assertLogs("vector_db", "WARNING") as logs:
+            self.assertIsNone(await self.service.add_evidence_batch("u1", [_COLOR_FEATURE]))
+        self.assertTrue(any("vector and evidence differ" in line for line in logs.output))
+        self.assertEqual(self.client.upserts, ["user_profiles"])
+
+
+class QdrantServiceSimilarUsersTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with mock.patch.object(qdrant_service, "AsyncQdrantClient", _FakeQdrant):
+            self.service = QdrantService()
+        self.recommend = self.service.client.recommend
+        self.addAsyncCleanup(self.service.close)
+
+    async def test_unstored_profile_is_searched_by_vector(self):
+        self.recommend.side_effect = [UnexpectedResponse(404, "Not Found", b"", {}), []]
+
+        self.assertEqual(await self.service.get_similar_users("new-user"), [])
+        self.assertEqual(self.recommend.await_count, 2)
+        self.assertIsInstance(self.recommend.await_args.kwargs["positive"][0], list)
+
+    async def test_qdrant_errors_skip_the_fallback(self):
+        self.recommend.side_effect = UnexpectedResponse(503, "Service Unavailable", b"", {})
+
+        with self.assertLogs("vector_db.qdrant_service", "ERROR"):
+            self.assertEqual(await self.service.get_similar_users("u1"), [])
+        self.assertEqual(self.recommend.await_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""Tests for the one-time startup task claim."""
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from pymongo.errors import DuplicateKeyError
+
+from db import seeder
+
+
+def _db(update_one):
+    db = mock.Mock()
+    db.get_collection.return_value.update_one = update_one
+    return db
+
+
+class ClaimStartupTaskTest(unittest.IsolatedAsyncioTestCase):
+    async def test_unclaimed_task_is_claimed(self):
+        update_one = mock.AsyncMock()
+
+        self.assertTrue(await seeder.claim_startup_task(_db(update_one), "startup"))
+        (query, update), kwargs = update_one.await_args
+        self.assertEqual(query["_id"], "startup")
+        self.assertTrue(kwargs["upsert"])
+        self.assertGreater(update["$set"]["expires_at"], datetime.now(timezone.utc))
+
+    async def test_task_claimed_by_another_worker_is_skipped(self):
+        update_one = mock.AsyncMock(side_effect=DuplicateKeyError("E11000 duplicate key"))
+
+        self.assertFalse(await seeder.claim_startup_task(_db(update_one), "startup"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""Tests for the sentiment analyzer's import cost and JSON LLM answer parsing."""
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+import orjson
+
+from llm_api.sentiment_analyzer import parse_llm_json
+
+
+class ParseLlmJsonTest(unittest.TestCase):
+    def test_plain_json(self):
+        self.assertEqual(parse_llm_json('{"features": []}'), {"features": []})
+
+    def test_fenced_json(self):
+        for content in ('```json\n{"a": 1}\n```', '```\n{"a": 1}\n```', 'Sure:\n```json {"a": 1} ```'):
+            with self.subTest(content=content):
+                self.assertEqual(parse_llm_json(content), {"a": 1})
+
+    def test_invalid_json_raises(self):
+        with self.assertRaises(orjson.JSONDecodeError):
+            parse_llm_json('```json\n{"reply": "Hi"\n```')
+
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_import_does_not_load_langchain(self):
+        # Fresh interpreter: other tests may already have imported LangChain
+        code = (
+            "import sys, llm_api.sentiment_analyzer; "
+            "sys.exit(any(m.startswith('langchain') for m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1])
+        self.assertEqual(result.returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
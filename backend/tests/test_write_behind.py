@@ -0,0 +1,113 @@
+"""Tests for the write-behind batcher's flush and failure semantics."""
+import asyncio
+import unittest
+
+from vector_db.write_behind import WriteBehindBatcher
+
+
+class _FakeClient:
+    """Records upserts; fails the upsert numbered `fail_at` (1-based) if set."""
+
+    def __init__(self, fail_at=None):
+        self.upserts = []
+        self.fail_at = fail_at
+
+    async def upsert(self, collection_name, points):
+        await asyncio.sleep(0)
+        if self.fail_at == len(self.upserts) + 1:
+            self.fail_at = None
+            raise ConnectionError("qdrant down")
+        self.upserts.append((collection_name, points))
+
+
+class WriteBehindBatcherTest(unittest.IsolatedAsyncioTestCase):
+    def make_batcher(self, client, **kwargs):
+        kwargs.setdefault("flush_interval", 60.0)
+        batcher = WriteBehindBatcher(client, "profiles", to_points=list, **kwargs)
+        self.addAsyncCleanup(batcher.close)
+        return batcher
+
+    async def test_flush_coalesces_writes_per_point(self):
+        client = _FakeClient()
+        batcher = self.make_batcher(client)
+        first = batcher.put("a", 1)
+        second = batcher.put("a", 2)
+        batcher.put("b", 1)
+
+        self.assertIs(first, second)
+        self.assertEqual(batcher.get("a"), 2)
+        self.assertEqual(await batcher.flush(), 2)
+        self.assertEqual(client.upserts, [("profiles", [("a", 2), ("b", 1)])])
+        self.assertIsNone(await first)
+        self.assertIsNone(batcher.get("a"))
+
+    async def test_flush_splits_into_batches(self):
+        client = _FakeClient()
+        batcher = self.make_batcher(client, max_batch_size=2)
+        for point_id in "abcde":
+            batcher.put(point_id, point_id)
+
+        self.assertEqual(await batcher.flush(), 5)
+        self.assertEqual([len(points) for _, points in client.upserts], [2, 2, 1])
+
+    async def test_put_is_acknowledged_by_background_flush(self):
+        client = _FakeClient()
+        batcher = self.make_batcher(client, flush_interval=0.01)
+
+        await asyncio.wait_for(batcher.put("a", 1), timeout=1.0)
+        self.assertEqual(client.upserts, [("profiles", [("a", 1)])])
+
+    async def test_failed_batch_fails_its_writers(self):
+        client = _FakeClient(fail_at=2)
+        failed = []
+        batcher = self.make_batcher(client, max_batch_size=2, on_failure=failed.extend)
+        writes = {point_id: batcher.put(point_id, point_id) for point_id in "abcd"}
+
+        with self.assertLogs("vector_db.write_behind", "ERROR"):
+            self.assertEqual(await batcher.flush(), 2)
+        self.assertEqual(failed, [("c", "c"), ("d", "d")])
+        self.assertIsNone(await writes["a"])
+        self.assertIsNone(await writes["b"])
+        for point_id in "cd":
+            with self.assertRaises(ConnectionError):
+                await writes[point_id]
+        self.assertIsNone(batcher.get("c"))
+
+    async def test_write_after_failure_gets_a_new_future(self):
+        client = _FakeClient(fail_at=1)
+        batcher = self.make_batcher(client)
+        failed_write = batcher.put("a", 1)
+        with self.assertLogs("vector_db.write_behind", "ERROR"):
+            await batcher.flush()
+
+        retry = batcher.put("a", 2)
+        self.assertIsNot(retry, failed_write)
+        await batcher.flush()
+        self.assertIsNone(await retry)
+        self.assertEqual(client.upserts, [("profiles", [("a", 2)])])
+
+    async def test_cancelled_write_is_still_flushed(self):
+        client = _FakeClient()
+        failed = []
+        batcher = self.make_batcher(client, on_failure=failed.extend)
+        batcher.put("a", 1).cancel()
+        later = batcher.put("a", 2)
+
+        with self.assertNoLogs("vector_db.write_behind", "ERROR"):
+            self.assertEqual(await batcher.flush(), 1)
+        self.assertEqual(failed, [])
+        self.assertIsNone(await later)
+        self.assertEqual(client.upserts, [("profiles", [("a", 2)])])
+
+    async def test_close_flushes_pending_writes(self):
+        client = _FakeClient()
+        batcher = WriteBehindBatcher(client, "profiles", to_points=list, flush_interval=60.0)
+        write = batcher.put("a", 1)
+
+        await batcher.close()
+        self.assertTrue(write.done())
+        self.assertEqual(client.upserts, [("profiles", [("a", 1)])])
+
+
+if __name__ == "__main__":
+    unittest.main()
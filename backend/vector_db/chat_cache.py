@@ -0,0 +1,242 @@
+"""Semantic cache of chat responses in Qdrant.
+
+Stores each answered query's embedding together with the AI response and
+recommended products. A new query whose embedding is close enough to a
+recent one (cosine similarity >= threshold) reuses that answer instead of
+calling Gemini again.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import orjson
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    PayloadSchemaType,
+    PointStruct,
+    QuantizationSearchParams,
+    Range,
+    SearchParams,
+    VectorParams,
+)
+
+from .embedding_cache import get_or_compute_embedding
+
+if TYPE_CHECKING:
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "models/embedding-001"
+EMBEDDING_SIZE = 768  # Output dimension of EMBEDDING_MODEL
+
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() == "true"
+CHAT_CACHE_THRESHOLD = float(os.getenv("CHAT_CACHE_THRESHOLD", "0.92"))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+
+# Binary-quantized candidates are oversampled and rescored with the original
+# vectors, so the similarity threshold applies to exact cosine scores
+_SEARCH_PARAMS = SearchParams(
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0),
+)
+
+
+class ChatCacheService:
+    """Similarity cache of chat responses keyed by query embedding."""
+
+    def __init__(
+        self,
+        gemini_api_key: str,
+        threshold: float = CHAT_CACHE_THRESHOLD,
+        ttl_seconds: float = CHAT_CACHE_TTL_SECONDS,
+    ):
+        """Initialize the Qdrant client and the query embedder.
+
+        Args:
+            gemini_api_key: Google Gemini API key (used for embeddings)
+            threshold: Minimum cosine similarity for a cache hit
+            ttl_seconds: How long a cached response stays valid
+        """
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        qdrant_host = os.getenv("QDRANT_HOST", "localhost")
+        qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
+        qdrant_grpc_port = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+        # Protobuf over gRPC instead of JSON over REST for every call
+        prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+
+        self.client = QdrantClient(
+            host=qdrant_host,
+            port=qdrant_port,
+            grpc_port=qdrant_grpc_port,
+            prefer_grpc=prefer_grpc,
+        )
+        self.collection_name = "chat_cache"
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.embeddings: "GoogleGenerativeAIEmbeddings" = GoogleGenerativeAIEmbeddings(
+            model=EMBEDDING_MODEL,
+            google_api_key=gemini_api_key,
+        )
+
+        self._initialize_collection()
+
+    def _initialize_collection(self):
+        """Create the cache collection (and its timestamp index) if missing."""
+        try:
+            collections = self.client.get_collections().collections
+            if any(c.name == self.collection_name for c in collections):
+                return
+
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(size=EMBEDDING_SIZE, distance=Distance.COSINE),
+                # 1 bit per dimension kept in RAM; searches rescore with the
+                # full vectors (see _SEARCH_PARAMS)
+                quantization_config=BinaryQuantization(
+                    binary=BinaryQuantizationConfig(always_ram=True),
+                ),
+            )
+            # Lookups and eviction both filter on the insertion time
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name="ts",
+                field_schema=PayloadSchemaType.FLOAT,
+            )
+            logger.info("Created collection: %s", self.collection_name)
+        except Exception as e:
+            logger.error("Error initializing chat cache collection: %s", e)
+
+    def _fresh_filter(self) -> Filter:
+        return Filter(must=[
+            FieldCondition(key="ts", range=Range(gte=time.time() - self.ttl_seconds)),
+        ])
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Embed a query, or return None if the embedding call fails."""
+        try:
+            return await get_or_compute_embedding(text, self.embeddings.embed_query)
+        except Exception as e:
+            logger.error("Error embedding chat query: %s", e)
+            return None
+
+    async def lookup(self, text: str) -> Tuple[Optional[Dict], Optional[List[float]]]:
+        """Find a cached response for a semantically similar recent query.
+
+        Args:
+            text: The user's message
+
+        Returns:
+            Tuple of (cached payload or None, query embedding or None). The
+            embedding is returned so a miss can be stored without re-embedding.
+        """
+        vector = await self.embed(text)
+        if vector is None:
+            return None, None
+
+        try:
+            results = await asyncio.to_thread(
+                self.client.search,
+                collection_name=self.collection_name,
+                query_vector=vector,
+                query_filter=self._fresh_filter(),
+                limit=1,
+                score_threshold=self.threshold,
+                search_params=_SEARCH_PARAMS,
+            )
+        except Exception as e:
+            logger.error("Error searching chat cache: %s", e)
+            return None, vector
+
+        return (results[0].payload if results else None), vector
+
+    async def store(self, vector: List[float], payload: Dict) -> bool:
+        """Cache a response under its query embedding.
+
+        Args:
+            vector: Query embedding returned by `lookup`
+            payload: Response data (ai_response, products, search_query, ...)
+
+        Returns:
+            True if successful
+        """
+        # Qdrant payloads must be plain JSON
+        payload = orjson.loads(orjson.dumps(payload, default=str))
+        payload["ts"] = time.time()
+        try:
+            await asyncio.to_thread(
+                self.client.upsert,
+                collection_name=self.collection_name,
+                points=[PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload)],
+            )
+            return True
+        except Exception as e:
+            logger.error("Error storing chat cache entry: %s", e)
+            return False
+
+    def evict_expired(self) -> bool:
+        """Delete cache entries older than the TTL.
+
+        Returns:
+            True if successful
+        """
+        try:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=Filter(must=[
+                    FieldCondition(key="ts", range=Range(lt=time.time() - self.ttl_seconds)),
+                ])),
+            )
+            return True
+        except Exception as e:
+            logger.error("Error evicting chat cache entries: %s", e)
+            return False
+
+
+# Singleton instance
+_chat_cache_service: Optional[ChatCacheService] = None
+_chat_cache_service_lock = threading.Lock()
+
+
+def get_chat_cache_service(gemini_api_key: str) -> Optional[ChatCacheService]:
+    """Get or create the chat cache singleton.
+
+    Returns:
+        ChatCacheService instance, or None if the cache is disabled
+    """
+    global _chat_cache_service
+
+    if not CHAT_CACHE_ENABLED:
+        return None
+
+    if _chat_cache_service is None:
+        with _chat_cache_service_lock:
+            if _chat_cache_service is None:
+                _chat_cache_service = ChatCacheService(gemini_api_key)
+
+    return _chat_cache_service
+
+
+async def get_chat_cache_service_async(gemini_api_key: str) -> Optional[ChatCacheService]:
+    """Get or create the chat cache singleton without blocking the event loop.
+
+    Creating the service connects the synchronous Qdrant client and may
+    create the collection, so that runs in a worker thread (e.g. on the first
+    request when the startup warm-up failed).
+
+    Returns:
+        ChatCacheService instance, or None if the cache is disabled
+    """
+    if _chat_cache_service is not None or not CHAT_CACHE_ENABLED:
+        return _chat_cache_service
+    return await asyncio.to_thread(get_chat_cache_service, gemini_api_key)
@@ -0,0 +1,75 @@
+"""In-process LRU cache of text embeddings.
+
+Repeated (or differently cased / padded) messages reuse their embedding
+instead of calling the embedding model again.
+"""
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+
+def _cache_key(text: str) -> bytes:
+    """Fixed-size key for the normalized text."""
+    return hashlib.blake2b(text.strip().lower().encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """LRU mapping of normalized text to its embedding vector."""
+
+    def __init__(self, maxsize: int = EMBEDDING_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # Key -> embedding, most recently used last
+        self._entries: "OrderedDict[bytes, List[float]]" = OrderedDict()
+
+    async def get_or_compute(self, text: str, embed: Callable[[str], List[float]]) -> List[float]:
+        """Return the cached embedding for `text`, computing it on a miss.
+
+        Args:
+            text: Text to embed
+            embed: Blocking embedding function, run in a worker thread on a miss
+
+        Returns:
+            The embedding vector
+        """
+        key = _cache_key(text)
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+        self.misses += 1
+        vector = await asyncio.to_thread(embed, text)
+        self._entries[key] = vector
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return vector
+
+    def stats(self) -> Dict[str, int]:
+        """Current size and hit/miss counters."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Shared by every embedding caller in the process
+_embedding_cache = EmbeddingCache()
+
+
+async def get_or_compute_embedding(text: str, embed: Callable[[str], List[float]]) -> List[float]:
+    """Embed `text` through the shared LRU cache (see `EmbeddingCache.get_or_compute`)."""
+    return await _embedding_cache.get_or_compute(text, embed)
+
+
+def get_embedding_cache_stats() -> Dict[str, int]:
+    """Size and hit/miss counters of the shared embedding cache."""
+    return _embedding_cache.stats()
@@ -2,34 +2,248 @@
 
 Manages user feature weights and evidence based on sentiment analysis.
 Tracks feature importance like size, color, material, brand, price, etc.
+
+Feature weights are the vectors of the `user_profiles` collection; evidence
+history is kept in the payload-only `user_evidence` collection, so appending
+evidence does not rewrite (and re-index) a profile vector.
 """
+import asyncio
+import bisect
+import logging
 import os
+import time
 import uuid
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import grpc
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    Batch,
+    Distance,
+    QuantizationSearchParams,
+    RecommendRequest,
+    Record,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ScoredPoint,
+    SearchParams,
+    VectorParams,
+)
+
+from llm_api.keyword_automaton import KeywordAutomaton
+
+from .write_behind import WriteBehindBatcher
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+logger = logging.getLogger(__name__)
 
-# Feature dimensions mapping (8 core features for demo)
+# Feature dimensions mapping (8 core features for demo), alphabetical and in
+# vector order; vectors stored with the previous layout are converted by
+# vector_db/reorder_profile_vectors.py
 FEATURE_DIMENSIONS = {
-    "size": 0,
+    "brand": 0,
     "color": 1,
-    "material": 2,
-    "brand": 3,
+    "durability": 2,
+    "material": 3,
     "price": 4,
-    "trend": 5,
-    "durability": 6,
-    "shipping": 7,
+    "shipping": 5,
+    "size": 6,
+    "trend": 7,
 }
 
 VECTOR_SIZE = 8  # Total feature dimensions
 
+# Stored in every profile point's payload; points without it still use the
+# previous (non-alphabetical) vector layout
+FEATURE_LAYOUT_KEY = "feature_layout"
+FEATURE_LAYOUT_VERSION = 2
+
+# Feature names in vector order (the dict's insertion order)
+_FEATURES_BY_INDEX = tuple(FEATURE_DIMENSIONS)
+
+# Int8-quantized candidates are oversampled and rescored with the original
+# vectors, so similarity scores stay exact
+_SEARCH_PARAMS = SearchParams(
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0),
+)
+
+# Product tag keywords per feature; a tag counts for the first matching
+# feature in this order
+_TAG_FEATURE_KEYWORDS = {
+    "size": ("fit", "size", "sizing"),
+    "color": ("color", "colour"),
+    "material": ("material", "fabric", "quality"),
+}
+_TAG_AUTOMATON = KeywordAutomaton(_TAG_FEATURE_KEYWORDS)
+
+# Price importance by bucket: below 50, below 150, and above
+_PRICE_THRESHOLDS = (50, 150)
+_PRICE_PREFERENCES = (0.3, 0.5, 0.8)
+
+# Fixed namespace for user_id -> point id conversion (the DNS namespace)
+_USER_ID_NAMESPACE = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')
+
+# Worker processes serving the app (set by compose.prod.yaml and main.py)
+_WORKER_COUNT = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Profile points whose last known state is kept in memory (skips `retrieve`);
+# entries expire so writes made by other processes are picked up. Updates
+# rewrite the whole cached profile, so with several workers each would
+# overwrite the others' updates: the cache is off (TTL 0) by default then.
+PROFILE_CACHE_SIZE = int(os.getenv("QDRANT_PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL_SECONDS = float(
+    os.getenv("QDRANT_PROFILE_CACHE_TTL_SECONDS", "30" if _WORKER_COUNT <= 1 else "0")
+)
+
+# Evidence entries kept per user (oldest are dropped first)
+MAX_EVIDENCE_PER_USER = 50
+
+# Weight of a new sentiment score in a feature's exponential moving average
+EVIDENCE_LEARNING_RATE = 0.3
+# EMA constants folded with the score normalization:
+# w * (1 - lr) + lr * (score + 1) / 2 == w * _ONE_MINUS_LR + (score + 1) * _HALF_LR
+_ONE_MINUS_LR = 1.0 - EVIDENCE_LEARNING_RATE
+_HALF_LR = EVIDENCE_LEARNING_RATE / 2
 
+# Payload-only collection holding each profile's evidence history
+EVIDENCE_COLLECTION_NAME = "user_evidence"
+
+# Weight changes up to this size leave the stored profile vector as is
+VECTOR_WRITE_EPSILON = 1e-4
+
+# Evidence timestamp of the current second, formatted once per second
+_last_ts_sec = 0
+_last_ts_str = ""
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO-8601 string, at second resolution."""
+    global _last_ts_sec, _last_ts_str
+    sec = int(time.time())
+    if sec != _last_ts_sec:
+        _last_ts_str = datetime.utcfromtimestamp(sec).isoformat()
+        _last_ts_sec = sec
+    return _last_ts_str
+
+
+class _ProfileState(NamedTuple):
+    """In-memory state of a profile point.
+
+    The vector and evidence are updated in place; the point payloads are only
+    built when the state is flushed to Qdrant.
+    """
+    vector: np.ndarray  # float32 feature weights, as stored in Qdrant
+    user_id: str
+    evidence: Deque[Dict]  # Ring buffer of the last MAX_EVIDENCE_PER_USER entries
+    saved_vector: np.ndarray  # Weights last written to Qdrant (inf if never)
+
+
+def _new_state(
+    vector: np.ndarray, user_id: str, evidence: List[Dict], stored: bool = False
+) -> _ProfileState:
+    """Profile state holding (at most the last MAX_EVIDENCE_PER_USER of) `evidence`.
+
+    Args:
+        vector: float32 feature weights
+        user_id: User identifier
+        evidence: Evidence entries, oldest first
+        stored: Whether `vector` is already the one stored in Qdrant
+    """
+    saved_vector = vector.copy() if stored else np.full(VECTOR_SIZE, np.inf, dtype=np.float32)
+    return _ProfileState(
+        vector, user_id, deque(evidence, maxlen=MAX_EVIDENCE_PER_USER), saved_vector,
+    )
+
+
+def _state_from_points(point: Record, evidence_point: Optional[Record]) -> _ProfileState:
+    """Profile state of a point and its evidence point read from Qdrant."""
+    payload = point.payload or {}
+    # Profiles stored before evidence moved out keep it in their own payload
+    evidence_payload = (evidence_point.payload if evidence_point is not None else payload) or {}
+    return _new_state(
+        np.asarray(point.vector, dtype=np.float32),
+        payload.get("user_id", str(point.id)),
+        evidence_payload.get("evidence", []),
+        stored=True,
+    )
+
+
+def _apply_ema(vector: np.ndarray, indices: List[int], scores: List[float]) -> None:
+    """Blend sentiment scores into `vector[indices]` in place with NumPy updates.
+
+    Scores are clipped to [-1, 1] and the updated weights to [0, 1] first (LLM
+    scores and synced weights are not validated); the result is then the
+    same as applying `w = w * (1 - lr) + lr * (score + 1) / 2` for each update
+    in order, clamped to [0, 1], so repeated features compound.
+
+    Args:
+        vector: Feature weights to update
+        indices: Feature index of each update
+        scores: Sentiment score (-1.0 to 1.0) of each update
+    """
+    idx = np.array(indices, dtype=np.intp)
+    # Scores scaled to their share of the EMA step. With in-range inputs every
+    # intermediate weight stays in [0, 1], so clamping once at the end equals
+    # clamping after each step.
+    steps = (np.clip(np.array(scores, dtype=np.float32), -1.0, 1.0) + 1.0) * _HALF_LR
+    vector[idx] = np.clip(vector[idx], 0.0, 1.0)
+
+    if len(set(indices)) == len(indices):
+        # Distinct features (the usual case): one EMA step per weight
+        vector[idx] = np.clip(vector[idx] * _ONE_MINUS_LR + steps, 0.0, 1.0)
+        return
+
+    counts = np.bincount(idx, minlength=VECTOR_SIZE)
+    # Number of later updates to the same feature, which decay each step again
+    order = np.argsort(idx, kind="stable")
+    sorted_idx = idx[order]
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order)) - np.searchsorted(sorted_idx, sorted_idx)
+    later = counts[idx] - 1 - rank
+
+    vector *= _ONE_MINUS_LR ** counts
+    vector += np.bincount(idx, weights=steps * _ONE_MINUS_LR ** later, minlength=VECTOR_SIZE)
+    vector[idx] = np.clip(vector[idx], 0.0, 1.0)
+
+
+def _batch_from_states(states: List[Tuple[str, _ProfileState]]) -> Batch:
+    """Qdrant upsert batch of the profile vectors of queued states.
+
+    Parallel id/vector/payload lists skip building (and validating) a
+    `PointStruct` per point.
+    """
+    ids = []
+    vectors = []
+    payloads = []
+    # Qdrant takes plain lists; arrays are only converted here
+    for point_id, state in states:
+        ids.append(point_id)
+        vectors.append(state.vector.tolist())
+        payloads.append({"user_id": state.user_id, FEATURE_LAYOUT_KEY: FEATURE_LAYOUT_VERSION})
+    return Batch(ids=ids, vectors=vectors, payloads=payloads)
+
+
+def _evidence_batch_from_states(states: List[Tuple[str, _ProfileState]]) -> Batch:
+    """Qdrant upsert batch of the (vectorless) evidence points of queued states."""
+    ids = []
+    payloads = []
+    for point_id, state in states:
+        ids.append(point_id)
+        payloads.append({"user_id": state.user_id, "evidence": list(state.evidence)})
+    return Batch(ids=ids, vectors={}, payloads=payloads)
+
+
+@lru_cache(maxsize=131072)
 def _user_id_to_uuid(user_id: str) -> str:
     """
     Convert a user_id string to a valid UUID for Qdrant.
-    Uses UUID v5 (namespace-based) for consistent conversion.
+    Uses UUID v5 (namespace-based) for consistent conversion; the result is
+    memoized since it only depends on user_id.
     
     Args:
         user_id: User identifier string (can contain any characters)
@@ -37,9 +251,16 @@ def _user_id_to_uuid(user_id: str) -> str:
     Returns:
         UUID string that Qdrant will accept
     """
-    # Use DNS namespace for consistent UUID generation
-    namespace = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')
-    return str(uuid.uuid5(namespace, user_id))
+    return str(uuid.uuid5(_USER_ID_NAMESPACE, user_id))
+
+
+def _is_not_found(error: Exception) -> bool:
+    """Whether a Qdrant call failed because the point it referenced doesn't exist."""
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 404
+    if isinstance(error, grpc.RpcError):
+        return error.code() == grpc.StatusCode.NOT_FOUND
+    return False
 
 
 class QdrantService:
@@ -47,33 +268,264 @@ class QdrantService:
         """Initialize Qdrant client."""
         qdrant_host = os.getenv("QDRANT_HOST", "localhost")
         qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
+        qdrant_grpc_port = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+        # Protobuf over gRPC instead of JSON over REST for every call
+        prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
         
-        self.client = QdrantClient(host=qdrant_host, port=qdrant_port)
+        self.client = AsyncQdrantClient(
+            host=qdrant_host,
+            port=qdrant_port,
+            grpc_port=qdrant_grpc_port,
+            prefer_grpc=prefer_grpc,
+        )
         self.collection_name = "user_profiles"
         
-        # Initialize collection
-        self._initialize_collection()
+        # Profile writes are queued and upserted in batches (writers wait for
+        # their batch); points of a failed batch are dropped from the cache
+        self._writes = WriteBehindBatcher(
+            self.client,
+            self.collection_name,
+            to_points=_batch_from_states,
+            on_failure=self._forget_vector_writes,
+        )
+        self._evidence_writes = WriteBehindBatcher(
+            self.client,
+            EVIDENCE_COLLECTION_NAME,
+            to_points=_evidence_batch_from_states,
+            on_failure=self._forget_points,
+        )
+        
+        # Point id -> (last known profile state, expiry), most recently used last
+        self._points: "OrderedDict[str, Tuple[_ProfileState, float]]" = OrderedDict()
+        # Point id -> retrieve of a cold profile in progress
+        self._loading: Dict[str, "asyncio.Future[_ProfileState]"] = {}
+    
+    async def close(self):
+        """Flush queued profile writes and stop the write-behind tasks."""
+        await self._writes.close()
+        await self._evidence_writes.close()
     
-    def _initialize_collection(self):
-        """Create collection if it doesn't exist."""
+    async def _initialize_collection(self):
+        """Create the profile and evidence collections if they don't exist."""
         try:
-            collections = self.client.get_collections().collections
-            collection_exists = any(c.name == self.collection_name for c in collections)
+            collections = {c.name for c in (await self.client.get_collections()).collections}
             
-            if not collection_exists:
-                self.client.create_collection(
+            if self.collection_name not in collections:
+                await self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+                    # 1 byte per dimension kept in RAM; searches rescore with
+                    # the full vectors (see _SEARCH_PARAMS)
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True),
+                    ),
                 )
-                print(f"Created collection: {self.collection_name}")
+                logger.info("Created collection: %s", self.collection_name)
+            
+            if EVIDENCE_COLLECTION_NAME not in collections:
+                # Payload only: evidence points have no vectors to index
+                await self.client.create_collection(
+                    collection_name=EVIDENCE_COLLECTION_NAME,
+                    vectors_config={},
+                )
+                logger.info("Created collection: %s", EVIDENCE_COLLECTION_NAME)
         except Exception as e:
-            print(f"Error initializing collection: {e}")
+            logger.error("Error initializing collection: %s", e)
     
-    def _create_default_weights(self) -> List[float]:
-        """Create default feature weights (all 0.5)."""
-        return [0.5] * VECTOR_SIZE
+    def _cached_state(self, point_id: str) -> Optional[_ProfileState]:
+        """Return the last known state of a point without calling Qdrant."""
+        entry = self._points.get(point_id)
+        if entry is not None:
+            state, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._points.move_to_end(point_id)
+                return state
+            del self._points[point_id]
+        # Evicted from the cache but not flushed yet
+        return self._writes.get(point_id) or self._evidence_writes.get(point_id)
     
-    def sync_from_mongodb_data(self, user_id: str, mongodb_profile: Dict) -> bool:
+    def _remember_state(self, point_id: str, state: _ProfileState) -> None:
+        """Record a point's latest state in the in-memory cache."""
+        if PROFILE_CACHE_TTL_SECONDS <= 0:
+            return
+        self._points[point_id] = (state, time.monotonic() + PROFILE_CACHE_TTL_SECONDS)
+        self._points.move_to_end(point_id)
+        if len(self._points) > PROFILE_CACHE_SIZE:
+            self._points.popitem(last=False)
+    
+    def _forget_points(self, states: List[Tuple[str, _ProfileState]]) -> None:
+        """Drop cache entries still holding these (unsaved) point states."""
+        for point_id, state in states:
+            entry = self._points.get(point_id)
+            if entry is not None and entry[0] is state:
+                del self._points[point_id]
+    
+    def _forget_vector_writes(self, states: List[Tuple[str, _ProfileState]]) -> None:
+        """Drop failed vector writes from the cache and have them written again."""
+        for _, state in states:
+            # Differs from every weight, so the next write stores the vector
+            state.saved_vector.fill(np.inf)
+        self._forget_points(states)
+    
+    def invalidate(self, user_id: str) -> None:
+        """Forget the cached profile of a user written outside this service.
+        
+        Args:
+            user_id: User identifier
+        """
+        self._points.pop(_user_id_to_uuid(user_id), None)
+    
+    async def _write_state(self, point_id: str, state: _ProfileState) -> None:
+        """Write a profile through the batchers and remember it as the point's latest state.
+        
+        The evidence is always written; the vector only if a weight moved by
+        more than VECTOR_WRITE_EPSILON since it was last stored. Returns once
+        Qdrant has stored the writes (batched with other users'), so callers
+        never acknowledge an update that may not land. The two collections
+        are written separately, so if only one write fails it is retried once
+        to keep the vector and its evidence in step.
+        
+        Raises:
+            Exception: The upsert error if a batch holding this point failed
+        """
+        self._remember_state(point_id, state)
+        batchers = [self._evidence_writes]
+        if np.abs(state.vector - state.saved_vector).max() > VECTOR_WRITE_EPSILON:
+            state.saved_vector[:] = state.vector
+            batchers.append(self._writes)
+        errors = await self._put_state(batchers, point_id, state)
+        
+        failed = [batcher for batcher, error in zip(batchers, errors) if error is not None]
+        if failed and len(failed) < len(batchers):
+            logger.warning(
+                "Retrying the %s write of profile %s: %s",
+                failed[0].collection_name, point_id, next(e for e in errors if e is not None),
+            )
+            # The failure dropped the state from the cache (and, for the
+            # vector, marked it unsaved)
+            self._remember_state(point_id, state)
+            if self._writes in failed:
+                state.saved_vector[:] = state.vector
+            errors = await self._put_state(failed, point_id, state)
+            if errors[0] is not None:
+                logger.error(
+                    "Profile %s %s write failed again; its vector and evidence differ in Qdrant",
+                    point_id, failed[0].collection_name,
+                )
+        
+        error = next((e for e in errors if e is not None), None)
+        if error is not None:
+            raise error
+    
+    @staticmethod
+    async def _put_state(
+        batchers: List[WriteBehindBatcher], point_id: str, state: _ProfileState,
+    ) -> List[Optional[BaseException]]:
+        """Queue a state in each batcher and wait for the writes; return their errors."""
+        # Shielded: the futures are shared with the point's other writers, so
+        # a cancelled request must not cancel their acknowledgement
+        return [
+            result if isinstance(result, BaseException) else None
+            for result in await asyncio.gather(
+                *(asyncio.shield(batcher.put(point_id, state)) for batcher in batchers),
+                return_exceptions=True,
+            )
+        ]
+    
+    def _create_default_weights(self) -> np.ndarray:
+        """Create default feature weights (all 0.5)."""
+        return np.full(VECTOR_SIZE, 0.5, dtype=np.float32)
+
+    def _default_profile(self, user_id: str) -> Dict:
+        """Profile with every feature weight at 0.5 and no evidence."""
+        return {
+            "user_id": user_id,
+            "feature_weights": {
+                feature: 0.5 for feature in FEATURE_DIMENSIONS
+            },
+            "evidence": [],
+        }
+
+    def _create_default_state(self, user_id: str) -> _ProfileState:
+        """Initialize a new profile in memory and return its state.
+
+        Nothing is written until the profile is first updated, so read-only
+        users cost no Qdrant writes.
+        """
+        point_id = _user_id_to_uuid(user_id)
+        state = _new_state(self._create_default_weights(), user_id, [])
+        self._remember_state(point_id, state)
+        return state
+
+    async def _load_state(self, user_id: str) -> _ProfileState:
+        """Return a user's profile state, creating a default one if missing.
+
+        Raises:
+            Exception: If Qdrant could not be read
+        """
+        point_id = _user_id_to_uuid(user_id)
+
+        # Only a cold profile needs a round-trip to Qdrant
+        state = self._cached_state(point_id)
+        if state is not None:
+            return state
+
+        # Concurrent loads of the same cold profile share one retrieve, so
+        # their in-place updates land on the same state
+        loading = self._loading.get(point_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._fetch_state(user_id, point_id))
+            self._loading[point_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(point_id, None))
+        return await asyncio.shield(loading)
+
+    async def _fetch_state(self, user_id: str, point_id: str) -> _ProfileState:
+        """Read a profile state from Qdrant, creating a default one if missing."""
+        results, evidence_results = await asyncio.gather(
+            self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[point_id],
+                with_vectors=True,
+            ),
+            self.client.retrieve(collection_name=EVIDENCE_COLLECTION_NAME, ids=[point_id]),
+        )
+        if not results:
+            return self._create_default_state(user_id)
+
+        state = _state_from_points(results[0], evidence_results[0] if evidence_results else None)
+        self._remember_state(point_id, state)
+        return state
+
+    def _profile_from_state(self, user_id: str, state: _ProfileState) -> Dict:
+        """Build the profile dict of a stored (or queued) point."""
+        # Copy: the state's evidence keeps changing in place
+        evidence = list(state.evidence)
+
+        # Ensure all weights are between 0.0 and 1.0
+        feature_weights = dict(
+            zip(_FEATURES_BY_INDEX, np.clip(state.vector, 0.0, 1.0).tolist())
+        )
+
+        return {
+            "user_id": user_id,  # Return original user_id
+            "feature_weights": feature_weights,
+            "evidence": evidence,
+        }
+
+    def _state_from_mongodb_data(self, user_id: str, mongodb_profile: Dict) -> Optional[_ProfileState]:
+        """Build the profile state of a MongoDB profile, or None if it has no weights."""
+        if "feature_weights" not in mongodb_profile:
+            return None
+
+        # Convert feature weights dict to vector (FEATURE_DIMENSIONS order)
+        feature_weights = mongodb_profile["feature_weights"]
+        vector = np.array(
+            [feature_weights.get(f, 0.5) for f in _FEATURES_BY_INDEX], dtype=np.float32,
+        )
+
+        return _new_state(vector, user_id, mongodb_profile.get("evidence", []))
+
+    async def sync_from_mongodb_data(self, user_id: str, mongodb_profile: Dict) -> bool:
         """Sync user profile data from MongoDB to Qdrant.
         
         Args:
@@ -89,45 +541,60 @@ class QdrantService:
             True if successful
         """
         try:
-            if "feature_weights" not in mongodb_profile:
+            state = self._state_from_mongodb_data(user_id, mongodb_profile)
+            if state is None:
                 return False
             
-            # Convert user_id to UUID for Qdrant compatibility
-            point_id = _user_id_to_uuid(user_id)
-            
-            # Convert feature weights dict to vector
-            feature_weights = mongodb_profile["feature_weights"]
-            vector = [
-                feature_weights.get(f, 0.5) for f in sorted(FEATURE_DIMENSIONS.keys())
-            ]
-            
-            # Get evidence if available
-            evidence = mongodb_profile.get("evidence", [])
-            
-            # Store user_id in payload so we can retrieve it later
-            payload = {
-                "user_id": user_id,  # Store original user_id
-                "evidence": evidence
-            }
-            
-            # Upsert to Qdrant
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[
-                    PointStruct(
-                        id=point_id,  # Use UUID
-                        vector=vector,
-                        payload=payload,
-                    )
-                ],
-            )
+            # Upsert to Qdrant (UUID point id for Qdrant compatibility)
+            await self._write_state(_user_id_to_uuid(user_id), state)
             
             return True
         except Exception as e:
-            print(f"Error syncing from MongoDB: {e}")
+            logger.error("Error syncing from MongoDB: %s", e)
             return False
     
-    def get_user_profile(self, user_id: str) -> Optional[Dict]:
+    async def sync_many_from_mongodb_data(self, mongodb_profiles: List[Dict]) -> int:
+        """Sync a batch of MongoDB user profiles to Qdrant in a single upsert per collection.
+        
+        Args:
+            mongodb_profiles: Profiles as stored in MongoDB (see
+                `sync_from_mongodb_data`); entries without a user_id or
+                feature weights are skipped.
+        
+        Returns:
+            Number of profiles synced
+        """
+        states = []
+        for profile in mongodb_profiles:
+            user_id = profile.get("user_id")
+            if not user_id:
+                continue
+            state = self._state_from_mongodb_data(user_id, profile)
+            if state is not None:
+                states.append((_user_id_to_uuid(user_id), state))
+        
+        if not states:
+            return 0
+        
+        try:
+            await asyncio.gather(
+                self.client.upsert(
+                    collection_name=self.collection_name, points=_batch_from_states(states),
+                ),
+                self.client.upsert(
+                    collection_name=EVIDENCE_COLLECTION_NAME,
+                    points=_evidence_batch_from_states(states),
+                ),
+            )
+            for point_id, state in states:
+                state.saved_vector[:] = state.vector
+                self._remember_state(point_id, state)
+            return len(states)
+        except Exception as e:
+            logger.error("Error syncing batch from MongoDB: %s", e)
+            return 0
+    
+    async def get_user_profile(self, user_id: str) -> Optional[Dict]:
         """Get user profile with feature weights and evidence.
         
         Args:
@@ -142,65 +609,81 @@ class QdrantService:
             }
         """
         try:
-            # Convert user_id to UUID for Qdrant lookup
+            return self._profile_from_state(user_id, await self._load_state(user_id))
+        except Exception as e:
+            logger.error("Error getting user profile: %s", e)
+            # Return default on error
+            return self._default_profile(user_id)
+    
+    async def _load_states(self, user_ids: List[str]) -> Dict[str, _ProfileState]:
+        """Return several users' profile states with a single retrieve per collection.
+        
+        Cached states need no round-trip; the rest are fetched together and
+        unknown users get a default state, as in `_load_state`.
+        
+        Raises:
+            Exception: If Qdrant could not be read
+        """
+        states: Dict[str, _ProfileState] = {}
+        missing: Dict[str, str] = {}  # point id -> user_id
+        for user_id in user_ids:
             point_id = _user_id_to_uuid(user_id)
-            
-            results = self.client.retrieve(
+            state = self._cached_state(point_id)
+            if state is not None:
+                states[user_id] = state
+            else:
+                missing[point_id] = user_id
+        
+        if not missing:
+            return states
+        
+        results, evidence_results = await asyncio.gather(
+            self.client.retrieve(
                 collection_name=self.collection_name,
-                ids=[point_id]
-            )
+                ids=list(missing),
+                with_vectors=True,
+            ),
+            self.client.retrieve(collection_name=EVIDENCE_COLLECTION_NAME, ids=list(missing)),
+        )
+        evidence_points = {str(point.id): point for point in evidence_results}
+        for point in results:
+            point_id = str(point.id)
+            state = _state_from_points(point, evidence_points.get(point_id))
+            self._remember_state(point_id, state)
+            states[missing.pop(point_id)] = state
+        
+        for user_id in missing.values():
+            states[user_id] = self._create_default_state(user_id)
+        return states
+    
+    async def get_user_profiles(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """Get several user profiles with a single retrieve per collection.
+        
+        Profiles that are cached need no round-trip; the rest are fetched
+        together. Unknown users get a default profile, as in `get_user_profile`.
+        
+        Args:
+            user_ids: User identifiers
             
-            if results:
-                vector = results[0].vector
-                payload = results[0].payload
-                evidence = payload.get("evidence", [])
-                
-                # Ensure all weights are between 0.0 and 1.0
-                feature_weights = {
-                    feature: max(0.0, min(1.0, float(vector[idx])))
-                    for feature, idx in FEATURE_DIMENSIONS.items()
-                }
-                
-                return {
-                    "user_id": user_id,  # Return original user_id
-                    "feature_weights": feature_weights,
-                    "evidence": evidence,
-                }
-            else:
-                # Initialize new profile
-                default_vector = self._create_default_weights()
-                point_id = _user_id_to_uuid(user_id)
-                
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=[
-                        PointStruct(
-                            id=point_id,
-                            vector=default_vector,
-                            payload={"user_id": user_id, "evidence": []},
-                        )
-                    ],
-                )
-                
-                return {
-                    "user_id": user_id,
-                    "feature_weights": {
-                        feature: 0.5 for feature in FEATURE_DIMENSIONS.keys()
-                    },
-                    "evidence": [],
-                }
+        Returns:
+            Dict of user_id -> profile (see `get_user_profile`)
+        """
+        try:
+            states = await self._load_states(user_ids)
         except Exception as e:
-            print(f"Error getting user profile: {e}")
-            # Return default on error
-            return {
-                "user_id": user_id,
-                "feature_weights": {
-                    feature: 0.5 for feature in FEATURE_DIMENSIONS.keys()
-                },
-                "evidence": [],
-            }
+            logger.error("Error getting user profiles: %s", e)
+            # Return default on error (cached profiles are still known)
+            profiles = {}
+            for user_id in user_ids:
+                state = self._cached_state(_user_id_to_uuid(user_id))
+                profiles[user_id] = (
+                    self._profile_from_state(user_id, state) if state is not None
+                    else self._default_profile(user_id)
+                )
+            return profiles
+        return {user_id: self._profile_from_state(user_id, state) for user_id, state in states.items()}
     
-    def add_evidence(
+    async def add_evidence(
         self, 
         user_id: str, 
         feature: str, 
@@ -220,72 +703,77 @@ class QdrantService:
         Returns:
             True if successful
         """
-        try:
-            if feature not in FEATURE_DIMENSIONS:
-                return False
-            
-            # Get current profile
-            profile = self.get_user_profile(user_id)
-            if not profile:
-                return False
-            
-            # Create evidence entry
-            evidence_entry = {
-                "feature": feature,
-                "sentence": sentence,
-                "sentiment": sentiment,
-                "score": score,
-                "timestamp": datetime.utcnow().isoformat(),
-            }
-            
-            # Update evidence list
-            evidence_list = profile["evidence"]
-            evidence_list.append(evidence_entry)
-            
-            # Keep only last 50 evidence entries per user
-            if len(evidence_list) > 50:
-                evidence_list = evidence_list[-50:]
-            
-            # Update feature weight using exponential moving average
-            current_weight = profile["feature_weights"][feature]
-            learning_rate = 0.3
+        if feature not in FEATURE_DIMENSIONS:
+            return False
+        
+        profile = await self.add_evidence_batch(user_id, [{
+            "feature": feature,
+            "sentence": sentence,
+            "sentiment": sentiment,
+            "score": score,
+        }])
+        return profile is not None
+    
+    async def add_evidence_batch(self, user_id: str, features: List[Dict]) -> Optional[Dict]:
+        """Add several evidence entries and update their weights in one batched write.
+        
+        Args:
+            user_id: User identifier
+            features: Sentiment features, each with "feature", "sentence",
+                "sentiment" and "score" keys; unknown features are skipped
             
-            # Normalize score to 0-1 range (score comes in as -1.0 to 1.0)
-            normalized_score = (score + 1.0) / 2.0
+        Returns:
+            The updated profile (see `get_user_profile`) once it is stored in
+            Qdrant, or None on failure (a malformed feature leaves the
+            profile unchanged)
+        """
+        try:
+            # Validate and map every feature before touching the (shared,
+            # cached) state, so a malformed one can't leave it half-updated
+            timestamp = _now_iso()
+            indices = []
+            scores = []
+            entries = []
+            for feature_data in features:
+                feature = feature_data["feature"]
+                if feature not in FEATURE_DIMENSIONS:
+                    continue
+                score = float(feature_data["score"])
+                if not np.isfinite(score):
+                    raise ValueError(f"Invalid {feature} score: {score}")
+                indices.append(FEATURE_DIMENSIONS[feature])
+                scores.append(score)
+                entries.append({
+                    "feature": feature,
+                    "sentence": feature_data["sentence"],
+                    "sentiment": feature_data["sentiment"],
+                    "score": score,
+                    "timestamp": timestamp,
+                })
             
-            # Update weight: blend old weight with new score
-            new_weight = current_weight * (1 - learning_rate) + normalized_score * learning_rate
-            new_weight = max(0.0, min(1.0, new_weight))  # Clamp to [0, 1]
+            # Get current profile state; it is updated in place below
+            state = await self._load_state(user_id)
             
-            # Update vector
-            feature_idx = FEATURE_DIMENSIONS[feature]
-            updated_vector = [
-                profile["feature_weights"][f] for f in sorted(FEATURE_DIMENSIONS.keys())
-            ]
-            updated_vector[feature_idx] = new_weight
+            # The ring buffer drops the oldest beyond MAX_EVIDENCE_PER_USER
+            state.evidence.extend(entries)
             
-            # Convert user_id to UUID for Qdrant
-            point_id = _user_id_to_uuid(user_id)
+            if indices:
+                # Update weights using exponential moving average:
+                # blend old weights with the new (normalized) scores
+                _apply_ema(state.vector, indices, scores)
             
-            # Upsert to Qdrant
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[
-                    PointStruct(
-                        id=point_id,  # Use UUID
-                        vector=updated_vector,
-                        payload={"user_id": user_id, "evidence": evidence_list},
-                    )
-                ],
-            )
+            # One write for all features (batched with other users'); on
+            # failure nothing is returned, so callers don't persist it elsewhere
+            await self._write_state(_user_id_to_uuid(user_id), state)
             
-            return True
+            # Profile as it now reads back from Qdrant
+            return self._profile_from_state(user_id, state)
             
         except Exception as e:
-            print(f"Error adding evidence: {e}")
-            return False
+            logger.error("Error adding evidence: %s", e)
+            return None
     
-    def update_feature_weights(
+    async def update_feature_weights(
         self, 
         user_id: str, 
         weights: Dict[str, float]
@@ -300,42 +788,44 @@ class QdrantService:
             True if successful
         """
         try:
-            profile = self.get_user_profile(user_id)
-            if not profile:
-                return False
+            state = await self._load_state(user_id)
             
-            # Update weights (clamp to 0-1 range)
+            # Update weights in place (clamp to 0-1 range)
             for feature, weight in weights.items():
                 if feature in FEATURE_DIMENSIONS:
-                    profile["feature_weights"][feature] = max(0.0, min(1.0, weight))
-            
-            # Convert to vector
-            updated_vector = [
-                profile["feature_weights"][f] for f in sorted(FEATURE_DIMENSIONS.keys())
-            ]
-            
-            # Convert user_id to UUID for Qdrant
-            point_id = _user_id_to_uuid(user_id)
+                    state.vector[FEATURE_DIMENSIONS[feature]] = max(0.0, min(1.0, weight))
             
             # Upsert to Qdrant
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[
-                    PointStruct(
-                        id=point_id,  # Use UUID
-                        vector=updated_vector,
-                        payload={"user_id": user_id, "evidence": profile["evidence"]},
-                    )
-                ],
-            )
+            await self._write_state(_user_id_to_uuid(user_id), state)  # Use UUID
             
             return True
             
         except Exception as e:
-            print(f"Error updating feature weights: {e}")
+            logger.error("Error updating feature weights: %s", e)
             return False
     
-    def get_similar_users(self, user_id: str, limit: int = 5) -> List[Dict]:
+    @staticmethod
+    def _recommend_example(point_id: str, state: _ProfileState) -> Union[str, List[float]]:
+        """Recommend example of a point: its id, or its vector if never stored."""
+        if np.isinf(state.saved_vector).any():
+            return state.vector.tolist()
+        return point_id
+    
+    async def _recommend_similar(self, example: Union[str, List[float]], limit: int) -> list:
+        """Search by a stored point's own vector (or an explicit vector) in one Qdrant call.
+        
+        Given a point id, the recommend API looks the vector up server-side
+        (no separate retrieve) and excludes the query point from the results.
+        """
+        return await self.client.recommend(
+            collection_name=self.collection_name,
+            positive=[example],
+            limit=limit,
+            with_vectors=True,
+            search_params=_SEARCH_PARAMS,
+        )
+    
+    async def get_similar_users(self, user_id: str, limit: int = 5) -> List[Dict]:
         """Find users with similar preference profiles.
         
         Args:
@@ -346,51 +836,92 @@ class QdrantService:
             List of similar user profiles with similarity scores (0.0 to 1.0)
         """
         try:
-            profile = self.get_user_profile(user_id)
-            if not profile:
-                return []
-            
-            # Get vector
-            query_vector = [
-                profile["feature_weights"][f] for f in sorted(FEATURE_DIMENSIONS.keys())
-            ]
-            
-            # Search for similar vectors
-            results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=limit + 1,  # +1 because user itself will be in results
-            )
-            
-            # Filter out the query user and format results
-            similar_users = []
             query_point_id = _user_id_to_uuid(user_id)
+            try:
+                results = await self._recommend_similar(query_point_id, limit)
+            except Exception as e:
+                # Only a profile that isn't stored yet gets the fallback;
+                # outages and bad requests are reported as they are
+                if not _is_not_found(e):
+                    raise
+                # Load (or create) the profile as get_user_profile does, then
+                # search from it; a new default profile is searched by its
+                # vector without being written
+                state = await self._load_state(user_id)
+                await self._writes.flush()
+                results = await self._recommend_similar(self._recommend_example(query_point_id, state), limit)
+            
+            return self._format_similar_users(query_point_id, results, limit)
             
-            for result in results:
-                # Skip if it's the same user (compare UUIDs)
-                if result.id == query_point_id:
-                    continue
-                    
-                # Get the original user_id from payload
-                result_user_id = result.payload.get("user_id", str(result.id))
-                
-                # Cosine similarity is already 0-1 range
-                similarity = max(0.0, min(1.0, float(result.score)))
-                
-                similar_users.append({
-                    "user_id": result_user_id,  # Use original user_id from payload
-                    "similarity": similarity,  # Guaranteed to be 0.0 to 1.0
-                    "feature_weights": {
-                        feature: max(0.0, min(1.0, float(result.vector[idx])))
-                        for feature, idx in FEATURE_DIMENSIONS.items()
-                    },
-                })
+        except Exception as e:
+            logger.error("Error finding similar users: %s", e)
+            return []
+    
+    async def get_similar_users_batch(self, user_ids: List[str], limit: int = 5) -> Dict[str, List[Dict]]:
+        """Find similar users for several users with one batched Qdrant request.
+        
+        Users without a stored profile get an empty list.
+        
+        Args:
+            user_ids: User identifiers
+            limit: Number of similar users to return per user
             
-            return similar_users[:limit]
+        Returns:
+            Dict of user_id -> similar users (see `get_similar_users`)
+        """
+        try:
+            # Load (or create) every profile as get_similar_users does, and
+            # store queued writes before searching from them
+            states = await self._load_states(user_ids)
+            await self._writes.flush()
+            query_ids = [(user_id, _user_id_to_uuid(user_id)) for user_id in user_ids]
             
+            batch_results = await self.client.recommend_batch(
+                collection_name=self.collection_name,
+                requests=[
+                    RecommendRequest(
+                        positive=[self._recommend_example(point_id, states[user_id])],
+                        limit=limit,
+                        params=_SEARCH_PARAMS,
+                        with_vector=True,
+                        with_payload=True,
+                    )
+                    for user_id, point_id in query_ids
+                ],
+            )
         except Exception as e:
-            print(f"Error finding similar users: {e}")
+            logger.error("Error finding similar users (batch): %s", e)
+            return {user_id: [] for user_id in user_ids}
+        
+        similar = {user_id: [] for user_id in user_ids}
+        for (user_id, point_id), results in zip(query_ids, batch_results):
+            similar[user_id] = self._format_similar_users(point_id, results, limit)
+        return similar
+    
+    def _format_similar_users(
+        self, query_point_id: str, results: List[ScoredPoint], limit: int
+    ) -> List[Dict]:
+        """Turn recommend results into similar-user dicts, skipping the query user."""
+        # Filter out the query user (compare UUIDs)
+        results = [result for result in results if result.id != query_point_id][:limit]
+        if not results:
             return []
+        
+        # Clamp every similarity and weight to [0, 1] at once; cosine
+        # similarity is already in that range
+        scores = np.clip(np.array([r.score for r in results]), 0.0, 1.0)
+        weights = np.clip(np.array([r.vector for r in results], dtype=np.float32), 0.0, 1.0)
+        
+        similar_users = []
+        for result, similarity, vector in zip(results, scores.tolist(), weights.tolist()):
+            similar_users.append({
+                # Use original user_id from payload
+                "user_id": result.payload.get("user_id", str(result.id)),
+                "similarity": similarity,  # Guaranteed to be 0.0 to 1.0
+                "feature_weights": dict(zip(_FEATURES_BY_INDEX, vector)),
+            })
+        
+        return similar_users
     
     def get_feature_dimensions(self) -> Dict[str, int]:
         """Get all available feature dimensions."""
@@ -407,36 +938,40 @@ class QdrantService:
         # Extract basic signals from product data
         if "tags" in product and isinstance(product["tags"], list):
             for tag in product["tags"]:
-                tag_lower = tag.lower()
-                # Map tags to features
-                if any(word in tag_lower for word in ["fit", "size", "sizing"]):
-                    preferences["size"] = 0.7
-                elif any(word in tag_lower for word in ["color", "colour"]):
-                    preferences["color"] = 0.7
-                elif any(word in tag_lower for word in ["material", "fabric", "quality"]):
-                    preferences["material"] = 0.7
+                # Map tags to features (one scan per tag)
+                matched = {feature for feature, _ in _TAG_AUTOMATON.matched_values(tag.lower())}
+                for feature in _TAG_FEATURE_KEYWORDS:
+                    if feature in matched:
+                        preferences[feature] = 0.7
+                        break
         
         # Extract price preference
         if "price" in product:
-            price = product["price"]
             # Normalize price importance
-            if price < 50:
-                preferences["price"] = 0.3
-            elif price < 150:
-                preferences["price"] = 0.5
-            else:
-                preferences["price"] = 0.8
+            bucket = bisect.bisect_right(_PRICE_THRESHOLDS, product["price"])
+            preferences["price"] = _PRICE_PREFERENCES[bucket]
         
         return preferences
 
 
 # Singleton instance
 _qdrant_service: Optional[QdrantService] = None
+_qdrant_service_lock = asyncio.Lock()
 
 
-def get_qdrant_service() -> QdrantService:
-    """Get or create QdrantService singleton."""
+async def get_qdrant_service() -> QdrantService:
+    """Get or create QdrantService singleton (creating its collection once)."""
     global _qdrant_service
     if _qdrant_service is None:
-        _qdrant_service = QdrantService()
+        async with _qdrant_service_lock:
+            if _qdrant_service is None:
+                service = QdrantService()
+                await service._initialize_collection()
+                _qdrant_service = service
     return _qdrant_service
+
+
+async def close_qdrant_service() -> None:
+    """Flush and stop the QdrantService singleton, if it was created."""
+    if _qdrant_service is not None:
+        await _qdrant_service.close()
@@ -0,0 +1,98 @@
+"""One-off migration of stored profile vectors to the alphabetical feature layout.
+
+Profile vectors used to be laid out as size, color, material, brand, price,
+trend, durability, shipping; FEATURE_DIMENSIONS is now alphabetical. This
+rewrites the vectors of the `user_profiles` collection still in the old
+layout. Points written in the new layout carry a FEATURE_LAYOUT_KEY payload
+marker (the service and the startup sync both set it) and are skipped, so
+the script is safe to run more than once. Run it with the backend stopped,
+so it cannot overwrite a profile update made while it runs:
+
+    python -m vector_db.reorder_profile_vectors
+"""
+import asyncio
+import logging
+import os
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Batch, FieldCondition, Filter, MatchValue
+
+from .qdrant_service import FEATURE_DIMENSIONS, FEATURE_LAYOUT_KEY, FEATURE_LAYOUT_VERSION
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "user_profiles"
+SCROLL_BATCH_SIZE = 256
+
+# Feature names in the previous vector order
+_PREVIOUS_LAYOUT = (
+    "size", "color", "material", "brand", "price", "trend", "durability", "shipping",
+)
+
+# New vector = old vector[_PERMUTATION]
+_PERMUTATION = np.array(
+    [_PREVIOUS_LAYOUT.index(feature) for feature in FEATURE_DIMENSIONS], dtype=np.intp,
+)
+
+# Points not yet converted (no layout marker, or an older one)
+_OLD_LAYOUT_FILTER = Filter(must_not=[
+    FieldCondition(key=FEATURE_LAYOUT_KEY, match=MatchValue(value=FEATURE_LAYOUT_VERSION)),
+])
+
+
+async def reorder_profile_vectors(client: AsyncQdrantClient) -> int:
+    """Rewrite the old-layout profile vectors in the FEATURE_DIMENSIONS order.
+
+    Each point's vector and layout marker are written together in one
+    upsert, so an interrupted run can simply be restarted.
+
+    Args:
+        client: Qdrant client
+
+    Returns:
+        Number of vectors rewritten
+    """
+    rewritten = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=_OLD_LAYOUT_FILTER,
+            limit=SCROLL_BATCH_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points:
+            vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+            await client.upsert(
+                collection_name=COLLECTION_NAME,
+                points=Batch(
+                    ids=[point.id for point in points],
+                    vectors=vectors[:, _PERMUTATION].tolist(),
+                    payloads=[
+                        {**(point.payload or {}), FEATURE_LAYOUT_KEY: FEATURE_LAYOUT_VERSION}
+                        for point in points
+                    ],
+                ),
+            )
+            rewritten += len(points)
+        if offset is None:
+            return rewritten
+
+
+async def main():
+    client = AsyncQdrantClient(
+        host=os.getenv("QDRANT_HOST", "localhost"),
+        port=int(os.getenv("QDRANT_PORT", "6333")),
+        grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+        prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true",
+    )
+    rewritten = await reorder_profile_vectors(client)
+    logger.info("Reordered %d profile vectors", rewritten)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+"""Write-behind batching of Qdrant point upserts.
+
+Profile updates are queued per point and flushed by a background task in a
+single `upsert` per batch. Repeated updates to the same point before a flush
+collapse to the latest state, and queued states stay readable through `get`
+so callers see their own writes before they reach Qdrant. States are only
+turned into Qdrant points when their batch is flushed.
+
+`put` returns a future that resolves once the point is stored (or fails
+with the upsert's error), so callers can acknowledge a write only after it
+has landed.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from qdrant_client import AsyncQdrantClient
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_MAX_BATCH_SIZE = int(os.getenv("QDRANT_WRITE_BATCH_SIZE", "64"))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv("QDRANT_WRITE_FLUSH_SECONDS", "0.05"))
+
+
+class WriteBehindBatcher:
+    """Coalesces point upserts and flushes them to Qdrant in batches."""
+
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        collection_name: str,
+        to_points: Callable[[List[Tuple[str, Any]]], Any],
+        max_batch_size: int = WRITE_BEHIND_MAX_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_SECONDS,
+        on_failure: Optional[Callable[[List[Tuple[str, Any]]], None]] = None,
+    ):
+        """Set up the queue; the flush task starts with the first write.
+
+        Args:
+            client: Qdrant client used for the batched upserts
+            collection_name: Collection the points belong to
+            to_points: Builds the `upsert` points argument from a batch of
+                (point id, queued state) pairs
+            max_batch_size: Pending points that trigger an immediate flush
+            flush_interval: Seconds a queued point waits for more writes
+            on_failure: Called with the (point id, state) pairs that could
+                not be written
+        """
+        self.client = client
+        self.collection_name = collection_name
+        self.to_points = to_points
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.on_failure = on_failure
+
+        # Point id -> latest queued state
+        self._pending: Dict[str, Any] = {}
+        # States taken by the flush currently talking to Qdrant
+        self._in_flight: Dict[str, Any] = {}
+        # Point id -> future resolved when its queued state is stored
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        # Serializes flushes so batches reach Qdrant in the order they were taken
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def put(self, point_id: str, state: Any) -> "asyncio.Future[None]":
+        """Queue a point upsert, replacing any queued state of the same point.
+
+        Returns:
+            Future resolved once the point's state is stored; it raises the
+            upsert's exception if the write failed. It is shared by every
+            writer of the point, so await it through `asyncio.shield`.
+        """
+        self._pending[point_id] = state
+        waiter = self._waiters.get(point_id)
+        if waiter is None or waiter.done():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[point_id] = waiter
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._batch_full.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return waiter
+
+    def get(self, point_id: str) -> Optional[Any]:
+        """Return the queued (not yet stored) state of a point, if any."""
+        return self._pending.get(point_id) or self._in_flight.get(point_id)
+
+    async def flush(self) -> int:
+        """Upsert every queued point now.
+
+        Returns:
+            Number of points written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            self._in_flight, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, {}
+            self._batch_full.clear()
+            items = list(self._in_flight.items())
+
+            written = 0
+            try:
+                for start in range(0, len(items), self.max_batch_size):
+                    batch = items[start:start + self.max_batch_size]
+                    await self.client.upsert(
+                        collection_name=self.collection_name,
+                        points=self.to_points(batch),
+                    )
+                    written += len(batch)
+                    for point_id, _ in batch:
+                        waiter = waiters.pop(point_id)
+                        if not waiter.done():  # Cancelled by a writer
+                            waiter.set_result(None)
+            except Exception as e:
+                logger.error("Error flushing %d queued Qdrant writes: %s", len(items) - written, e)
+                if self.on_failure is not None:
+                    self.on_failure(items[written:])
+                for waiter in waiters.values():
+                    if waiter.done():
+                        continue
+                    waiter.set_exception(e)
+                    # Already logged here; callers that await still get the error
+                    waiter.exception()
+            finally:
+                self._in_flight = {}
+                # Flush cancelled mid-write: don't leave callers waiting forever
+                for waiter in waiters.values():
+                    if not waiter.done():
+                        waiter.cancel()
+            return written
+
+    async def close(self) -> None:
+        """Stop the flush task after a final flush."""
+        self._closed = True
+        self._has_pending.set()
+        self._batch_full.set()
+        if self._task is not None:
+            await self._task
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            await self._has_pending.wait()
+            self._has_pending.clear()
+            # Give further writes a short window to join this batch
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()